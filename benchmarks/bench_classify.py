@@ -0,0 +1,103 @@
+# ==============================================================================
+# 分類（_classify）のベンチマーク — キーワード照合の方式比較とラベル一致の確認
+#
+# 変更前: カテゴリごとに sum(kw in text for kw in XXX_KW) で全キーワードを照合し、
+#         数値有無は _NUM_PAT の正規表現を順に re.search
+# 変更後: キーワードを先頭文字で引くテーブル（_KW_TABLE）から、テキストに現れる文字の
+#         候補だけを照合する（_kw_counts）。数値有無は数字1文字の検索
+#
+# 入力は corpus.report_lines の業務報告風の行と、キーワードの断片・重なり（「改善点」と
+# 「改善」など）・数字・記号を混ぜたランダム文字列。全行でラベルが一致することを確認してから
+# 時間を比べる（一致しなければ最初の不一致を表示して終了コード 1）。
+#
+#   python benchmarks/bench_classify.py [報告行数] [ランダム行数]
+# ==============================================================================
+
+from __future__ import annotations
+
+import random
+import re
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import relay_core as core  # noqa: E402
+import corpus  # noqa: E402
+
+_OLD_NUM_PAT = [
+    r'\d+[%％]', r'\d+\.?\d*\s*[万億千百]?円', r'\d+\s*件',
+    r'前(月|年|期)比\s*\d+', r'[A-Z]{2,}\s*\d+', r'\d+\s*[倍割人台]',
+]
+
+
+# ── 変更前の実装 ──────────────────────────────────────────────────
+def old_has_num(text: str) -> bool:
+    return any(re.search(p, text) for p in _OLD_NUM_PAT) or bool(re.search(r'\d', text))
+
+
+def old_classify(text: str) -> str:
+    res     = sum(kw in text for kw in core.RESULT_KW)
+    insight = sum(kw in text for kw in core.INSIGHT_KW)
+    what    = sum(kw in text for kw in core.WHAT_KW)
+    has_n   = old_has_num(text)
+
+    if has_n and res >= 1:                    return "RESULT"
+    if res >= 2:                              return "RESULT"
+    if insight >= 2 and insight > what:       return "INSIGHT"
+    if what >= 1:                             return "WHAT"
+    return "WHAT"
+
+
+# ── コーパス ──────────────────────────────────────────────────────
+def fuzz_lines(n: int, seed: int = 0) -> list[str]:
+    """キーワード・その断片・数字・記号・かなを混ぜたランダムな行"""
+    rng = random.Random(seed)
+    kws = core.WHAT_KW + core.RESULT_KW + core.INSIGHT_KW + core.WHEN_KW
+    chars = sorted(set("".join(kws))) + list("0123456789０１２３ABCKPIabc .,、。・:：()（）\t")
+    pieces = kws + [kw[:-1] for kw in kws if len(kw) > 1] + [kw[1:] for kw in kws if len(kw) > 1]
+    pieces += ["の", "を", "が", "した", "する", "について"]
+    out = []
+    for _ in range(n):
+        parts = []
+        for _ in range(rng.randint(1, 12)):
+            r = rng.random()
+            if r < 0.45:
+                parts.append(rng.choice(pieces))
+            elif r < 0.85:
+                parts.append("".join(rng.choice(chars) for _ in range(rng.randint(1, 4))))
+            else:
+                parts.append(str(rng.randint(0, 10 ** rng.randint(1, 6))))
+        out.append("".join(parts))
+    return out
+
+
+def bench(label: str, fn, lines: list[str]) -> tuple[float, list[str]]:
+    t0 = time.perf_counter()
+    labels = [fn(t) for t in lines]
+    sec = time.perf_counter() - t0
+    print(f"  {label:<7} {sec:7.3f} s  {sec / len(lines) * 1e6:6.2f} µs/line")
+    return sec, labels
+
+
+def main() -> int:
+    n_report = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    n_fuzz   = int(sys.argv[2]) if len(sys.argv) > 2 else 50_000
+    lines = corpus.report_lines(n_report) + fuzz_lines(n_fuzz)
+    print(f"lines: {len(lines)}（報告 {n_report} + ランダム {n_fuzz}）")
+
+    before, old_labels = bench("before", old_classify, lines)
+    after,  new_labels = bench("after", core._classify, lines)
+    for text, a, b in zip(lines, old_labels, new_labels):
+        if a != b:
+            print(f"ラベル不一致: {text!r} before={a} after={b}")
+            return 1
+    counts = {c: new_labels.count(c) for c in ("WHAT", "RESULT", "INSIGHT")}
+    print(f"  labels  全行一致  {counts}")
+    print(f"  speedup {before / after:7.2f} x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
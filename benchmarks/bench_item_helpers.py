@@ -0,0 +1,129 @@
+# ==============================================================================
+# 抽出ヘルパーのマイクロベンチマーク — 1アイテムあたりのパターン処理コスト
+#
+# 変更前: _same_source / _collect_sources / _extract_when / _has_num が
+#         呼び出しごとに re.split / re.search を実行
+# 変更後: Step 2 で src_key / src_file / when_score / has_num を1回だけ算出し、
+#         ホットループでは属性を参照するだけ
+#
+#   python benchmarks/bench_item_helpers.py [アイテム数]
+# ==============================================================================
+
+from __future__ import annotations
+
+import re
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import relay_core as core  # noqa: E402
+
+_OLD_NUM_PAT = [
+    r'\d+[%％]', r'\d+\.?\d*\s*[万億千百]?円', r'\d+\s*件',
+    r'前(月|年|期)比\s*\d+', r'[A-Z]{2,}\s*\d+', r'\d+\s*[倍割人台]',
+]
+
+
+# ── 変更前の実装 ──────────────────────────────────────────────────
+def old_same_source(a: dict, b: dict) -> bool:
+    sa = re.split(r'[ スライド行シートp]', a.get("source", ""))[0]
+    sb = re.split(r'[ スライド行シートp]', b.get("source", ""))[0]
+    return bool(sa) and sa == sb
+
+
+def old_when_score(dh: str) -> int:
+    return (
+        4 if re.search(r'\d{4}[年/]\d{1,2}[月/]\d{1,2}', dh) else
+        3 if re.search(r'\d{4}年\d{1,2}月', dh) else
+        2 if re.search(r'\d{1,2}[月/]\d{1,2}|\d{1,2}月第\d週', dh) else
+        1
+    )
+
+
+def old_file_name(src: str) -> str:
+    return re.split(r'\s+(?:スライド|シート|p\.|ページ|行)\d+', src.strip())[0].strip()
+
+
+def old_has_num(text: str) -> bool:
+    return any(re.search(p, text) for p in _OLD_NUM_PAT) or bool(re.search(r'\d', text))
+
+
+def old_is_noise(text: str) -> bool:
+    t = text.strip()
+    if len(t) <= 4 or len(t) > 400:         return True
+    if core._NOISE_CHARS.match(t):            return True
+    if core._META_PAT.match(t):               return True
+    if re.match(r'^\d{1,4}[年/\-]\d{1,2}[月/\-]\d{1,2}[日]?\s*$', t): return True
+    return False
+
+
+# ── コーパス ──────────────────────────────────────────────────────
+def make_rows(n: int) -> list[tuple[str, str]]:
+    texts = [
+        "2026年4月15日に顧客対応フローの見直しを実施",
+        "問い合わせ件数が前月比20%削減",
+        "在庫管理システムの導入を推進（今月）",
+        "気付き：関係部署との早期連携が重要",
+        "4/12 障害対応の再発防止策を検討",
+    ]
+    srcs = ["report.pptx スライド{}", "kpi.xlsx KPI", "minutes.pdf p.{}", "memo.txt"]
+    return [(texts[i % len(texts)], srcs[i % len(srcs)].format(i % 30 + 1)) for i in range(n)]
+
+
+def bench(label: str, fn, rows) -> float:
+    t0 = time.perf_counter()
+    fn(rows)
+    per = (time.perf_counter() - t0) / len(rows) * 1e6
+    print(f"{label:<8} {per:7.2f} µs/item")
+    return per
+
+
+def run_old(rows) -> None:
+    items = []
+    for orig, src in rows:
+        old_is_noise(orig)
+        m = core._DATE_PAT.search(orig)
+        items.append({"original": orig, "source": src, "date_hint": m.group(0) if m else ""})
+    # ホットループ相当: 隣接ペア判定・時期・ソース・数値判定
+    for a, b in zip(items, items[1:]):
+        old_same_source(a, b)
+    for it in items:
+        if it["date_hint"]:
+            old_when_score(it["date_hint"])
+        old_file_name(it["source"])
+        old_has_num(it["original"])
+
+
+def run_new(rows) -> None:
+    items = []
+    src_parts: dict[str, tuple[str, str]] = {}
+    for orig, src in rows:
+        core._is_noise(orig)
+        m = core._DATE_PAT.search(orig)
+        dh = m.group(0) if m else ""
+        parts = src_parts.get(src)
+        if parts is None:
+            parts = src_parts[src] = (
+                core._SRC_KEY_SPLIT.split(src)[0],
+                core._SRC_FILE_SPLIT.split(src.strip())[0].strip(),
+            )
+        items.append(core._Item(orig, src, "", "WHAT", dh, frozenset(), parts[0], parts[1],
+                                core._when_score(dh), core._has_num(orig)))
+    for a, b in zip(items, items[1:]):
+        bool(a.src_key) and a.src_key == b.src_key
+    for it in items:
+        it.when_score, it.src_file, it.has_num
+
+
+def main() -> None:
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    rows = make_rows(n)
+    print(f"items: {n}")
+    before = bench("before", run_old, rows)
+    after  = bench("after", run_new, rows)
+    print(f"speedup  {before / after:7.2f} x")
+
+
+if __name__ == "__main__":
+    main()
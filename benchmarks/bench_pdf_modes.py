@@ -0,0 +1,61 @@
+# ==============================================================================
+# PDF 抽出モードのベンチマーク — layout（pdfplumber.extract_text）vs fast（pdfminer 直）
+#
+# ページキャッシュを通さずに _pdf_page_rows を各ページに適用し、
+#   lines/s : ノイズ除去前の採用行数 / 抽出秒数
+#   一致率  : layout の行のうち fast にも同じ文字列で現れる割合（重複は個数まで）
+#   順序一致: 両モードの行列が同じ順序で完全一致したページの割合
+# を比較する。引数で実 PDF を渡すとそれも対象にする（省略時は corpus.make_pdf）。
+#
+#   python benchmarks/bench_pdf_modes.py [ページ数] [file.pdf ...]
+# ==============================================================================
+
+from __future__ import annotations
+
+import io
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+import pdfplumber
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import relay_core as core  # noqa: E402
+from corpus import make_pdf  # noqa: E402
+
+
+def extract(fb: bytes, mode: str) -> tuple[list[tuple], float]:
+    pages = []
+    with pdfplumber.open(io.BytesIO(fb)) as pdf:
+        t0 = time.perf_counter()
+        for i, pg in enumerate(pdf.pages, 1):
+            pages.append(core._pdf_page_rows(pg, i, mode))
+        return pages, time.perf_counter() - t0
+
+
+def compare(name: str, fb: bytes) -> None:
+    layout, t_layout = extract(fb, "layout")
+    fast,   t_fast   = extract(fb, "fast")
+    n_layout = sum(map(len, layout))
+    n_fast   = sum(map(len, fast))
+    common = sum(sum((Counter(a) & Counter(b)).values()) for a, b in zip(layout, fast))
+    same_pages = sum(a == b for a, b in zip(layout, fast))
+
+    print(f"{name}  pages: {len(layout)}")
+    print(f"  layout  {n_layout:6d} lines  {t_layout:7.3f} s  {n_layout / t_layout:9.0f} lines/s")
+    print(f"  fast    {n_fast:6d} lines  {t_fast:7.3f} s  {n_fast / t_fast:9.0f} lines/s"
+          f"  x{t_layout / t_fast:4.1f}")
+    print(f"  一致率 {common / max(1, n_layout):6.1%}   順序一致ページ {same_pages}/{len(layout)}")
+
+
+def main() -> None:
+    args = sys.argv[1:]
+    n = int(args.pop(0)) if args and args[0].isdigit() else 50
+    compare(f"corpus.make_pdf({n})", make_pdf(n, seed=7))
+    for path in args:
+        compare(Path(path).name, Path(path).read_bytes())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+# ==============================================================================
+# _rd_pptx ベンチマーク — python-pptx 経由 vs スライド XML の直接ストリーム読み
+#
+# corpus.make_pptx のデッキを読み、旧実装（Presentation → shapes → paragraphs）と
+# 現在の _rd_pptx の所要時間・ピークメモリ（tracemalloc）と、出力の一致を比較する。
+#
+#   python benchmarks/bench_pptx_read.py [スライド数]
+# ==============================================================================
+
+from __future__ import annotations
+
+import io
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import relay_core as core  # noqa: E402
+from corpus import make_pptx  # noqa: E402
+
+
+def rd_pptx_wrappers(fb: bytes, nm: str):
+    """旧実装: python-pptx のラッパーオブジェクトで段落を辿る"""
+    from pptx import Presentation
+    prs = Presentation(io.BytesIO(fb))
+    for i, sl in enumerate(prs.slides, 1):
+        for sh in sl.shapes:
+            if not sh.has_text_frame:
+                continue
+            for pa in sh.text_frame.paragraphs:
+                t = pa.text.strip()
+                if t and len(t) > 4:
+                    yield t, f"{nm} スライド{i}"
+
+
+def measure(reader, fb: bytes) -> tuple[list, float, int]:
+    """時間は tracemalloc なしで計り（5回の最小値）、ピークメモリは別に読み直して計る"""
+    sec = float("inf")
+    for _ in range(5):
+        t0 = time.perf_counter()
+        rows = list(reader(fb, "deck.pptx"))
+        sec = min(sec, time.perf_counter() - t0)
+    tracemalloc.start()
+    list(reader(fb, "deck.pptx"))
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return rows, sec, peak
+
+
+def main() -> None:
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    fb = make_pptx(n)
+    list(rd_pptx_wrappers(fb, "warmup"))      # import・初回読み込みを計測から除く
+    list(core._rd_pptx(fb, "warmup"))
+
+    old, t_old, m_old = measure(rd_pptx_wrappers, fb)
+    new, t_new, m_new = measure(core._rd_pptx, fb)
+    print(f"slides: {n}  lines: {len(new)}  deck: {len(fb) / 1024:.0f} KiB  same: {old == new}")
+    print(f"python-pptx  {t_old * 1000:8.1f} ms  peak {m_old / 2**20:7.2f} MiB")
+    print(f"xml stream   {t_new * 1000:8.1f} ms  peak {m_new / 2**20:7.2f} MiB"
+          f"  x{t_old / t_new:4.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+# ==============================================================================
+# PPTX 図形ヘルパーのベンチマーク — 1スライドあたりの描画コスト
+#
+# 変更前: 色定数は呼ぶたびに RGBColor を作るラムダ、_pptx_rect / _pptx_text は
+#         呼び出しごとに Pt / qn / etree を import し、Inches・Pt・a:lnSpc と
+#         run のフォント属性を python-pptx のプロパティ経由で1つずつ設定
+# 変更後: 色・長さはキャッシュ済みのオブジェクト、段落と run の書式はでき上がった
+#         a:pPr / a:rPr 要素を複製して差し込む
+#
+# 同じテキストで _draw_initiative_slide（_pptx_rect / _pptx_text を約20回呼ぶ。雛形・
+# 表紙の作成はこの経路）を新しいスライドに描き、ヘルパーだけを新旧で差し替えて比べる。
+# 両方のスライドの XML が一致することも確認する（不一致なら終了コード 1）。
+#
+#   python benchmarks/bench_pptx_shapes.py [スライド数]
+# ==============================================================================
+
+from __future__ import annotations
+
+import sys
+import time
+from pathlib import Path
+
+from lxml import etree
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import relay_core as core  # noqa: E402
+
+IV = {
+    "title":   "顧客対応フローの見直しを実施し問い合わせ件数の削減を推進",
+    "when":    "2026年4月15日",
+    "what":    "・対応フローを再設計\n・FAQ を整備\n・一次回答テンプレートを導入",
+    "result":  "・問い合わせ件数が前月比20%削減\n・平均対応時間が3時間短縮",
+    "insight": "・早期に関係部署と連携したことが成功の要因\n・他窓口にも横展開可能",
+    "sources": ["report.pptx", "kpi.xlsx"],
+}
+
+
+# ── 変更前の実装 ──────────────────────────────────────────────────
+# 呼び出し側は C_WHITE() のように色ごとに RGBColor を新しく作って渡していた。
+# 現在の定数はタプルなので、入口で同じように毎回 RGBColor を作る。
+def _old_rgb(c):
+    return core.RGBColor(*c) if c else None
+
+
+def old_pptx_rect(sl, l, t, w, h, fill_rgb, line_rgb=None, line_w=0.5):
+    from pptx.util import Pt as _Pt
+    fill_rgb, line_rgb = _old_rgb(fill_rgb), _old_rgb(line_rgb)
+    shape = sl.shapes.add_shape(
+        core.MSO_SHAPE.RECTANGLE, core.Inches(l), core.Inches(t), core.Inches(w), core.Inches(h)
+    )
+    shape.fill.solid()
+    shape.fill.fore_color.rgb = fill_rgb
+    if line_rgb:
+        shape.line.color.rgb = line_rgb
+        shape.line.width = _Pt(line_w)
+    else:
+        shape.line.fill.background()
+    return shape
+
+
+def old_pptx_text(sl, text, l, t, w, h, size, bold=False, color=None,
+                  italic=False, align=None, spacing=1.15, name=None):
+    from pptx.oxml.ns import qn
+    from lxml import etree as _et
+    from pptx.util import Pt as _Pt
+
+    color = _old_rgb(color)
+    if align is None:
+        align = core.PP_ALIGN.LEFT
+
+    tb = sl.shapes.add_textbox(core.Inches(l), core.Inches(t), core.Inches(w), core.Inches(h))
+    if name:
+        tb.name = name
+    tf = tb.text_frame
+    tf.word_wrap = True
+
+    def _para(p, txt):
+        p.alignment = align
+        pPr = p._p.get_or_add_pPr()
+        lnSpc = _et.SubElement(pPr, qn('a:lnSpc'))
+        spcPct = _et.SubElement(lnSpc, qn('a:spcPct'))
+        spcPct.set('val', str(int(spacing * 100000)))
+        r = p.add_run()
+        r.text = txt
+        r.font.size = _Pt(size)
+        r.font.bold = bold
+        r.font.italic = italic
+        if color:
+            r.font.color.rgb = color
+
+    segs = str(text).split('\n')
+    _para(tf.paragraphs[0], segs[0])
+    for seg in segs[1:]:
+        _para(tf.add_paragraph(), seg)
+    return tb
+
+
+# ── 計測 ──────────────────────────────────────────────────────────
+def draw(label: str, texts: dict, n: int) -> tuple[float, bytes]:
+    prs = core.Presentation()
+    t0 = time.perf_counter()
+    for _ in range(n):
+        core._draw_initiative_slide(prs.slides.add_slide(prs.slide_layouts[6]), texts)
+    ms = (time.perf_counter() - t0) / n * 1000
+    print(f"  {label:<7} {ms:7.3f} ms/slide")
+    return ms, etree.tostring(prs.slides[0]._element)
+
+
+def main() -> int:
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    core._load_pptx()
+    texts = core._initiative_texts(IV, 1, n, "2026年10月17日")
+    print(f"slides: {n}")
+
+    new_rect, new_text = core._pptx_rect, core._pptx_text
+    core._pptx_rect, core._pptx_text = old_pptx_rect, old_pptx_text
+    try:
+        before, old_xml = draw("before", texts, n)
+    finally:
+        core._pptx_rect, core._pptx_text = new_rect, new_text
+    after, new_xml = draw("after", texts, n)
+
+    if old_xml != new_xml:
+        print("スライド XML 不一致")
+        return 1
+    print("  xml     一致")
+    print(f"  speedup {before / after:7.2f} x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,55 @@
+# ==============================================================================
+# 施策スライド並列描画のベンチマーク — ワーカー数ごとの save_pptx 所要時間
+#
+#   毎回スライドキャッシュを空にし、すべての施策スライドを描画し直す条件で計測する。
+#   プールの起動コストを除くため、各ワーカー数で一度ウォームアップしてから計る。
+#
+#   python benchmarks/bench_slide_workers.py [スライド数] [ワーカー数 ...]
+# ==============================================================================
+
+from __future__ import annotations
+
+import io
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import relay_core as core  # noqa: E402
+
+
+def initiatives(n: int) -> list[dict]:
+    return [{
+        "title":   f"業務フロー{i}の見直しを実施し処理時間の短縮を推進",
+        "when":    f"2026年{i % 12 + 1}月{i % 28 + 1}日",
+        "what":    f"・手順{i}を再設計\n・チェックリストを整備\n・テンプレートを導入",
+        "result":  f"・処理件数が前月比{i % 40 + 5}%改善\n・平均対応時間が短縮",
+        "insight": "・関係部署との早期連携が有効\n・他部署にも横展開可能",
+        "sources": [f"report_{i}.pptx", "kpi.xlsx"] if i % 3 else [],
+    } for i in range(n)]
+
+
+def run(ivs: list[dict], workers: int) -> float:
+    core._slide_cache().clear()
+    t0 = time.perf_counter()
+    core.save_pptx(ivs, io.BytesIO(), workers=workers)
+    return time.perf_counter() - t0
+
+
+def main() -> None:
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    counts = [int(a) for a in sys.argv[2:]] or [1, 2, 4, 8]
+    ivs = initiatives(n)
+
+    print(f"slides: {n}  cpus: {os.cpu_count()}")
+    base = None
+    for w in counts:
+        run(ivs[:max(2, w * 2)], w)          # プール起動・雛形作成のウォームアップ
+        sec = run(ivs, w)
+        base = base or sec
+        print(f"workers {w:2d}  {sec:7.3f} s  x{base / sec:4.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+# ==============================================================================
+# アップロードのスプール ベンチマーク — 同時アップロード時のメモリ
+#
+# UploadedFile 相当（io.BytesIO + name / size）の大きなデッキ（テキスト50枚 + 画像相当の
+# 非圧縮バイナリ）を、複数スレッドから同時に extract_initiatives（読み込みワーカーあり）へ渡す。
+# スプールなし（SPOOL_MIN_BYTES を無限大）/ あり の各設定を別プロセスで実行し、
+#   親の追加確保 : アップロード自体を除いた tracemalloc のピーク
+#   子の最大RSS : 読み込みワーカープロセスの最大 RSS（bytes を渡すとワーカーへ複製される）
+# と所要時間を比較する。
+#
+#   python benchmarks/bench_spool.py [MiB/件] [同時数] [ワーカー数]
+# ==============================================================================
+
+from __future__ import annotations
+
+import io
+import os
+import sys
+import time
+import zipfile
+import resource
+import subprocess
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import relay_core as core  # noqa: E402
+from corpus import make_pptx  # noqa: E402
+
+
+class Upload(io.BytesIO):
+    def __init__(self, name: str, data: bytes):
+        super().__init__(data)
+        self.name = name
+        self.size = len(data)
+
+
+def make_deck(mib: int, seed: int) -> bytes:
+    buf = io.BytesIO(make_pptx(50, seed=seed))
+    with zipfile.ZipFile(buf, "a") as zf:
+        zf.writestr("ppt/media/image999.bin", os.urandom(mib * 2**20), zipfile.ZIP_STORED)
+    return buf.getvalue()
+
+
+def _worker_rss(pause: float) -> float:
+    """プールのワーカー内で呼ぶ: そのワーカーの最大 RSS（MiB）"""
+    time.sleep(pause)
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def child(mib: int, users: int, workers: int, spool: bool) -> None:
+    """1つの設定を計測して結果を1行で出力する（別プロセスで呼ばれる）"""
+    if not spool:
+        core.SPOOL_MIN_BYTES = float("inf")
+    # ワーカーは計測の前に起動しておく（起動時間・起動時のメモリを計測に含めない）
+    pool = core._read_pool(workers)
+    list(pool.map(time.sleep, [0.2] * workers))
+    # アップロードは2件ずつ1人分として、users 人が同時に抽出する
+    blobs = [make_deck(mib, seed) for seed in range(users * 2)]
+    sessions = [[Upload(f"deck{u}_{k}.pptx", blobs[u * 2 + k]) for k in range(2)]
+                for u in range(users)]
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(users) as ex:
+        list(ex.map(lambda files: core.extract_initiatives(files, workers=workers), sessions))
+    sec = time.perf_counter() - t0
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    # ワーカーは forkserver の子で、このプロセスの RUSAGE_CHILDREN には入らないため各ワーカーに聞く
+    # （同時に眠らせて workers 個すべてに行き渡らせる）
+    kids = max(pool.map(_worker_rss, [0.2] * workers))
+    pool.shutdown()
+    label = "spool" if spool else "no spool"
+    print(f"  {label:9s} {sec:7.2f} s  親の追加確保 {peak / 2**20:7.1f} MiB  子の最大RSS {kids:7.1f} MiB")
+
+
+def main() -> None:
+    if sys.argv[1:2] == ["--child"]:
+        child(*map(int, sys.argv[2:5]), spool=sys.argv[5] == "1")
+        return
+    mib = sys.argv[1] if len(sys.argv) > 1 else "100"
+    users = sys.argv[2] if len(sys.argv) > 2 else "4"
+    workers = sys.argv[3] if len(sys.argv) > 3 else "2"
+    print(f"uploads: {users} users x 2 x {mib} MiB  read workers: {workers}")
+    for spool in ("0", "1"):
+        subprocess.run([sys.executable, __file__, "--child", mib, users, workers, spool], check=True)
+
+
+if __name__ == "__main__":
+    main()
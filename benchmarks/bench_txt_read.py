@@ -0,0 +1,61 @@
+# ==============================================================================
+# _rd_txt ベンチマーク — 文字コード総当たり + 全体デコード vs 判定1回 + チャンク単位デコード
+#
+# Shift-JIS（cp932）のログを、先頭が ASCII だけの場合とそうでない場合の2通りで読み、
+# 旧実装と現在の _rd_txt の所要時間・ピークメモリ（tracemalloc）・出力の一致を比較する。
+#
+#   python benchmarks/bench_txt_read.py [行数]
+# ==============================================================================
+
+from __future__ import annotations
+
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import relay_core as core  # noqa: E402
+from corpus import report_lines  # noqa: E402
+
+
+def rd_txt_trial(fb: bytes, nm: str):
+    """旧実装: 候補の文字コードで全体のデコードを順に試す"""
+    for enc in ["utf-8", "shift-jis", "cp932", "utf-16", "latin-1"]:
+        try:
+            text = fb.decode(enc)
+        except (UnicodeDecodeError, LookupError):
+            continue
+        for line in text.split("\n"):
+            t = line.strip()
+            if t and len(t) > 4:
+                yield t, nm
+        return
+
+
+def measure(reader, fb: bytes) -> tuple[list, float, int]:
+    t0 = time.perf_counter()
+    rows = list(reader(fb, "log.txt"))
+    sec = time.perf_counter() - t0
+    tracemalloc.start()
+    for _ in reader(fb, "log.txt"):
+        pass
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return rows, sec, peak
+
+
+def main() -> None:
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 300_000
+    body = "\n".join(report_lines(n, 5)).encode("cp932", "ignore")
+    header = b"".join(b"2026-04-01 00:00:%02d INFO job started\n" % (i % 60) for i in range(n // 2))
+    for label, fb in (("sjis", body), ("ascii header + sjis", header + body)):
+        old, t_old, m_old = measure(rd_txt_trial, fb)
+        new, t_new, m_new = measure(core._rd_txt, fb)
+        print(f"{label}: {len(fb) / 2**20:.1f} MiB  lines: {len(new)}  same: {old == new}")
+        print(f"  trial decode  {t_old * 1000:8.1f} ms  peak {m_old / 2**20:7.2f} MiB")
+        print(f"  sniff+chunks  {t_new * 1000:8.1f} ms  peak {m_new / 2**20:7.2f} MiB")
+
+
+if __name__ == "__main__":
+    main()
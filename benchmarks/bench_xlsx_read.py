@@ -0,0 +1,81 @@
+# ==============================================================================
+# _rd_xlsx ベンチマーク — 通常モード vs read_only ストリーミング
+#
+# 5万行のワークブックを生成し、旧実装（セルオブジェクトを全件構築）と
+# 現在の _rd_xlsx の所要時間・ピークメモリ（tracemalloc）を比較する。
+#
+#   python benchmarks/bench_xlsx_read.py [行数]
+# ==============================================================================
+
+from __future__ import annotations
+
+import io
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+import openpyxl
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import relay_core as core  # noqa: E402
+
+
+def make_workbook(n_rows: int) -> bytes:
+    """KPI エクスポート風のワークブック（テキスト列あり + 数値だけの横長シート）"""
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet("KPI")
+    ws.append(["日付", "施策", "担当", "件数", "前月比", "備考"])
+    for i in range(n_rows):
+        ws.append([
+            f"2026/{i % 12 + 1:02d}/{i % 28 + 1:02d}",
+            f"問い合わせ対応フローの見直しを実施 その{i}",
+            f"第{i % 9 + 1}営業部",
+            i % 500,
+            f"{i % 40 - 20}%",
+            "前月比で件数が減少" if i % 3 == 0 else None,
+        ])
+    raw = wb.create_sheet("RAW")
+    for i in range(n_rows // 5):
+        raw.append([i * c for c in range(40)])
+    buf = io.BytesIO()
+    wb.save(buf)
+    return buf.getvalue()
+
+
+def rd_xlsx_full(fb: bytes, nm: str):
+    """変更前の実装（load_workbook 通常モード）"""
+    wb = openpyxl.load_workbook(io.BytesIO(fb), data_only=True)
+    for sn in wb.sheetnames:
+        for row in wb[sn].iter_rows():
+            cells = [str(c.value).strip() for c in row if c.value is not None]
+            if cells:
+                t = " | ".join(cells)
+                if len(t) > 4:
+                    yield t, f"{nm} {sn}"
+
+
+def measure(label: str, reader, fb: bytes) -> None:
+    t0 = time.perf_counter()
+    n = sum(1 for _ in reader(fb, "kpi.xlsx"))
+    elapsed = time.perf_counter() - t0
+
+    tracemalloc.start()
+    for _ in reader(fb, "kpi.xlsx"):
+        pass
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(f"{label:<10} {elapsed:8.2f} s  peak {peak / 2**20:8.1f} MiB  {n:>7} 行")
+
+
+def main() -> None:
+    n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    fb = make_workbook(n_rows)
+    print(f"workbook: {n_rows} 行 / {len(fb) / 2**20:.1f} MiB")
+    measure("full", rd_xlsx_full, fb)
+    measure("read_only", core._rd_xlsx, fb)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+# ==============================================================================
+# 合成コーパス生成 — 月次報告書風の pptx / xlsx / pdf / txt を作る
+#
+# ベンチマーク用。乱数シードを固定しているため、同じ引数なら同じ内容になる。
+# ==============================================================================
+
+from __future__ import annotations
+
+import io
+import random
+
+# ── 文面の部品 ────────────────────────────────────────────────────────────
+_SUBJECTS = [
+    "顧客対応フロー", "在庫管理システム", "営業資料", "障害対応手順", "品質管理体制",
+    "問い合わせ窓口", "新人教育研修", "サーバ基盤", "請求業務", "社内ポータル",
+]
+_WHAT = ["の見直しを実施", "を導入", "の横展開を推進", "の改善に着手", "の統合を検討",
+         "の運用を開始", "の整備を完了", "の移行計画を策定"]
+_RESULT = ["問い合わせ件数が前月比{n}%削減", "対応時間が{n}時間短縮", "コストを{n}万円削減",
+           "目標達成率{n}%を記録", "エラー件数が{n}件から0件に減少", "満足度が{n}ポイント向上"]
+_INSIGHT = ["気付き：関係部署との早期連携が成功の要因", "学び：手順の標準化が再発防止のポイント",
+            "課題：原因分析の共有が次回の課題", "今後は知見を他部署へ横展開することを推奨",
+            "注意点：移行前の確認作業に時間を要した"]
+_WHEN = ["2026年{m}月{d}日", "{m}月第{w}週", "今月", "先月", "Q{q}", "2026年{m}月"]
+
+
+class Upload:
+    """Streamlit の UploadedFile と同じく name / read() を持つ入力"""
+
+    def __init__(self, name: str, data: bytes):
+        self.name = name
+        self._data = data
+
+    def read(self) -> bytes:
+        return self._data
+
+    @property
+    def size(self) -> int:
+        return len(self._data)
+
+
+def report_lines(n: int, seed: int = 0) -> list[str]:
+    """WHAT / RESULT / INSIGHT / 時期 が混ざった報告書の行を n 行作る"""
+    rnd = random.Random(seed)
+    out = []
+    for _ in range(n):
+        kind = rnd.random()
+        subj = rnd.choice(_SUBJECTS)
+        if kind < 0.45:
+            line = subj + rnd.choice(_WHAT)
+            if rnd.random() < 0.3:
+                when = rnd.choice(_WHEN).format(m=rnd.randint(1, 12), d=rnd.randint(1, 28),
+                                                w=rnd.randint(1, 4), q=rnd.randint(1, 4))
+                line = f"{when} {line}"
+        elif kind < 0.75:
+            line = f"{subj}：" + rnd.choice(_RESULT).format(n=rnd.randint(2, 90))
+        else:
+            line = rnd.choice(_INSIGHT) + f"（{subj}）"
+        out.append(line)
+    return out
+
+
+def make_txt(n_lines: int, encoding: str = "utf-8", seed: int = 0) -> bytes:
+    return "\n".join(report_lines(n_lines, seed)).encode(encoding)
+
+
+def make_pptx(n_slides: int, lines_per_slide: int = 6, seed: int = 0) -> bytes:
+    from pptx import Presentation
+    lines = report_lines(n_slides * lines_per_slide, seed)
+    prs = Presentation()
+    for i in range(n_slides):
+        sl = prs.slides.add_slide(prs.slide_layouts[1])
+        chunk = lines[i * lines_per_slide:(i + 1) * lines_per_slide]
+        sl.shapes.title.text = chunk[0]
+        sl.placeholders[1].text = "\n".join(chunk[1:])
+    buf = io.BytesIO()
+    prs.save(buf)
+    return buf.getvalue()
+
+
+def make_xlsx(n_rows: int, seed: int = 0) -> bytes:
+    import openpyxl
+    rnd = random.Random(seed)
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet("月次報告")
+    ws.append(["日付", "内容", "担当", "件数"])
+    for i, line in enumerate(report_lines(n_rows, seed)):
+        ws.append([f"2026/{i % 12 + 1:02d}/{i % 28 + 1:02d}", line,
+                   f"第{rnd.randint(1, 9)}営業部", rnd.randint(0, 500)])
+    buf = io.BytesIO()
+    wb.save(buf)
+    return buf.getvalue()
+
+
+def make_pdf(n_pages: int, lines_per_page: int = 40, seed: int = 0) -> bytes:
+    """
+    テキスト選択可能な日本語 PDF を直接組み立てる（追加ライブラリ不要）。
+    フォントは埋め込まず、Adobe-Japan1 の標準 CMap（UniJIS-UCS2-H）で文字を指定する。
+    """
+    lines = report_lines(n_pages * lines_per_page, seed)
+    objs: list[bytes] = [b""] * 5      # 1:Catalog 2:Pages 3:Font 4:CIDFont 5:FontDescriptor
+    kids = []
+    for p in range(n_pages):
+        chunk = lines[p * lines_per_page:(p + 1) * lines_per_page]
+        ops = " ".join(f"<{t.encode('utf-16-be').hex()}> Tj T*" for t in chunk)
+        content = f"BT /F1 10 Tf 40 800 Td 14 TL {ops} ET".encode("ascii")
+        objs.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(content), content))
+        objs.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % len(objs)
+        )
+        kids.append(len(objs))
+    objs[0] = b"<< /Type /Catalog /Pages 2 0 R >>"
+    objs[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (
+        b" ".join(b"%d 0 R" % k for k in kids), len(kids))
+    objs[2] = (b"<< /Type /Font /Subtype /Type0 /BaseFont /HeiseiKakuGo-W5 "
+               b"/Encoding /UniJIS-UCS2-H /DescendantFonts [4 0 R] >>")
+    objs[3] = (b"<< /Type /Font /Subtype /CIDFontType0 /BaseFont /HeiseiKakuGo-W5 "
+               b"/CIDSystemInfo << /Registry (Adobe) /Ordering (Japan1) /Supplement 2 >> "
+               b"/FontDescriptor 5 0 R /DW 1000 >>")
+    objs[4] = (b"<< /Type /FontDescriptor /FontName /HeiseiKakuGo-W5 /Flags 4 "
+               b"/FontBBox [0 -200 1000 900] /ItalicAngle 0 /Ascent 880 /Descent -120 "
+               b"/CapHeight 700 /StemV 80 >>")
+
+    out = io.BytesIO()
+    out.write(b"%PDF-1.4\n")
+    offsets = []
+    for i, body in enumerate(objs, 1):
+        offsets.append(out.tell())
+        out.write(b"%d 0 obj\n%s\nendobj\n" % (i, body))
+    xref = out.tell()
+    out.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objs) + 1))
+    for off in offsets:
+        out.write(b"%010d 00000 n \n" % off)
+    out.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objs) + 1, xref))
+    return out.getvalue()
+
+
+def make_bundle(size: int, formats=("pptx", "xlsx", "pdf", "txt"), seed: int = 0) -> list[Upload]:
+    """
+    1セット分のアップロードを作る。size はおおよその総行数で、各形式に等分する。
+    """
+    per = max(1, size // len(formats))
+    makers = {
+        "pptx": lambda: Upload("report.pptx", make_pptx(max(1, per // 6), seed=seed)),
+        "xlsx": lambda: Upload("kpi.xlsx", make_xlsx(per, seed=seed + 1)),
+        "pdf":  lambda: Upload("minutes.pdf", make_pdf(max(1, per // 40), seed=seed + 2)),
+        "txt":  lambda: Upload("memo.txt", make_txt(per, "cp932", seed=seed + 3)),
+    }
+    return [makers[f]() for f in formats]
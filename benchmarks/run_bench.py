@@ -0,0 +1,156 @@
+# ==============================================================================
+# 抽出・PPTX生成のベンチマーク
+#
+# 合成コーパス（benchmarks/corpus.py）を使い、段階ごとの所要時間と
+# ピークメモリ（tracemalloc）を計測する。Streamlit サーバーは起動しない。
+#
+#   python benchmarks/run_bench.py --size 4000 --slides 100 --out result.json
+#   python benchmarks/run_bench.py --size 4000 --compare result.json
+#
+# 段階: read / classify / group / link（extract_initiatives）
+#       build / save（generate_pptx）
+# peak_mib は tracemalloc（Python ヒープのみ）、max_rss_mib はプロセス全体の最大 RSS。
+# lxml が確保するメモリは後者にしか現れない。
+# 各回の前にプロセス内のキャッシュ（パース・PDF ページ・スライド）を空にし、読み込みの
+# プロセスプールも作り直す（ワーカー側の PDF ページキャッシュを持ち越さない）。
+# RELAY_PARSE_CACHE_DIR は無視する（ディスク層から読むと毎回が温まった計測になるため）。
+# ==============================================================================
+
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import resource
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.pop("RELAY_PARSE_CACHE_DIR", None)
+import relay_core as core  # noqa: E402
+import corpus  # noqa: E402
+
+STAGES = ("read", "classify", "group", "link", "build", "save")
+
+
+def _cold(workers: int) -> None:
+    """毎回読み込みから計測するため、キャッシュを空にして読み込みプールを新しいワーカーにする"""
+    core._parse_cache().clear()
+    core._page_cache().clear()
+    core._slide_cache().clear()
+    if workers > 1:
+        core._read_pool(workers).shutdown()
+        core._read_pool.cache_clear()
+        # ワーカーの起動は計測に含めない（同時に眠らせて workers 個すべてを起動させる）
+        list(core._read_pool(workers).map(time.sleep, [0.05] * workers))
+
+
+def _run_once(files, slides: int, workers: int) -> tuple[dict, list[dict]]:
+    _cold(workers)
+    timings: dict[str, float] = {}
+    initiatives = core.extract_initiatives(files, workers=workers, timings=timings)
+    deck = (initiatives * (slides // max(1, len(initiatives)) + 1))[:slides] if slides else initiatives
+    core.generate_pptx(deck, timings=timings)
+    return timings, initiatives
+
+
+def _peak_mib(fn) -> float:
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak / 2**20
+
+
+def run(args) -> dict:
+    formats = tuple(args.formats.split(","))
+    files = corpus.make_bundle(args.size, formats, seed=args.seed)
+
+    runs = []
+    initiatives: list[dict] = []
+    for _ in range(args.repeat):
+        t, initiatives = _run_once(files, args.slides, args.workers)
+        runs.append(t)
+
+    stages = {
+        s: {
+            "min":    min(r.get(s, 0.0) for r in runs),
+            "median": statistics.median(r.get(s, 0.0) for r in runs),
+        }
+        for s in STAGES
+    }
+
+    def _extract():
+        _cold(0)
+        core.extract_initiatives(files, workers=0)
+
+    deck = (initiatives * (args.slides // max(1, len(initiatives)) + 1))[:args.slides] \
+        if args.slides else initiatives
+
+    return {
+        "timestamp":   datetime.now().isoformat(timespec="seconds"),
+        "python":      platform.python_version(),
+        "size":        args.size,
+        "formats":     list(formats),
+        "input_bytes": sum(f.size for f in files),
+        "slides":      len(deck),
+        "workers":     args.workers,
+        "repeat":      args.repeat,
+        "initiatives": len(initiatives),
+        "stages":      stages,
+        "total":       sum(v["median"] for v in stages.values()),
+        "peak_mib": {
+            "extract":  _peak_mib(_extract),
+            "generate": _peak_mib(lambda: (_cold(0), core.generate_pptx(deck))),
+        },
+        "max_rss_mib": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }
+
+
+def _print(result: dict, base: dict | None) -> None:
+    print(f"size={result['size']} formats={','.join(result['formats'])} "
+          f"input={result['input_bytes'] / 2**20:.1f} MiB slides={result['slides']}")
+    for s in STAGES:
+        med = result["stages"][s]["median"]
+        line = f"  {s:<9} {med * 1000:9.1f} ms"
+        if base and s in base.get("stages", {}):
+            prev = base["stages"][s]["median"]
+            if prev > 0:
+                line += f"   ({med / prev:5.2f} x)"
+        print(line)
+    print(f"  {'total':<9} {result['total'] * 1000:9.1f} ms")
+    print(f"  peak      extract {result['peak_mib']['extract']:.1f} MiB / "
+          f"generate {result['peak_mib']['generate']:.1f} MiB / "
+          f"max RSS {result['max_rss_mib']:.1f} MiB")
+
+
+def main(argv=None) -> None:
+    ap = argparse.ArgumentParser(description="extract_initiatives / generate_pptx のベンチマーク")
+    ap.add_argument("--size", type=int, default=2000, help="入力のおおよその総行数")
+    ap.add_argument("--formats", default="pptx,xlsx,pdf,txt")
+    ap.add_argument("--slides", type=int, default=0,
+                    help="生成する施策スライド数（0 なら抽出結果のまま）")
+    ap.add_argument("--workers", type=int, default=0, help="読み込みの並列プロセス数")
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--out", help="結果を JSON で書き出すパス")
+    ap.add_argument("--compare", help="比較対象の結果 JSON")
+    args = ap.parse_args(argv)
+
+    result = run(args)
+    base = json.loads(Path(args.compare).read_text("utf-8")) if args.compare else None
+    _print(result, base)
+    if args.out:
+        Path(args.out).write_text(json.dumps(result, ensure_ascii=False, indent=2), "utf-8")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+# ==============================================================================
+# Project Relay — バッチ生成 CLI
+#
+# 入力バンドル（1チーム分のファイル一式）ごとに施策を抽出し、1つの .pptx を出力する。
+# Streamlit は使わない。
+#
+#   python relay_batch.py reports/ -o out/ -w 4
+#       reports/ 直下のサブディレクトリ1つ = 1バンドル（reports/team-a/*.pptx など）
+#   python relay_batch.py manifest.json -o out/
+#       {"team-a": ["a/report.pptx", "a/kpi.xlsx"], "team-b": [...]}
+#       （パスはマニフェストのあるディレクトリからの相対パス）
+# ==============================================================================
+
+from __future__ import annotations
+
+import sys
+import json
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from time import perf_counter
+
+from relay_core import extract_initiatives, save_pptx, default_extract_sink
+
+SUPPORTED = {".pptx", ".xlsx", ".pdf", ".txt"}
+
+
+class _LocalFile:
+    """
+    ローカルファイルを UploadedFile と同じ形（name / read()）で渡す。
+    path があるため extract_initiatives は bytes を読まずにファイルを直接開く。
+    """
+
+    def __init__(self, path: Path):
+        self.name = path.name
+        self.path = path
+
+    def read(self) -> bytes:
+        return self.path.read_bytes()
+
+
+def load_bundles(src: Path) -> dict[str, list[Path]]:
+    """ディレクトリまたはマニフェストから {バンドル名: ファイル一覧} を作る"""
+    if src.is_dir():
+        bundles = {
+            d.name: sorted(p for p in d.iterdir() if p.suffix.lower() in SUPPORTED)
+            for d in sorted(src.iterdir()) if d.is_dir()
+        }
+    else:
+        manifest = json.loads(src.read_text("utf-8"))
+        bundles = {
+            name: [src.parent / p for p in paths]
+            for name, paths in manifest.items()
+        }
+    return {name: files for name, files in bundles.items() if files}
+
+
+def _check_name(name: str) -> None:
+    """バンドル名は出力ファイル名になるため、out_dir の外を指す名前（区切り文字・.. など）は拒否する"""
+    if (not name or name in (".", "..") or "/" in name or "\\" in name
+            or Path(name).name != name):
+        raise ValueError(f"バンドル名に使えない文字が含まれています: {name!r}")
+
+
+def run_bundle(name: str, files: list[Path], out_dir: Path) -> dict:
+    """1バンドル分を抽出・生成して結果のサマリーを返す（ワーカープロセスで実行）"""
+    _check_name(name)
+    records: list[dict] = []
+    default = default_extract_sink()
+
+    def keep(record: dict) -> None:
+        # 抽出した行数を計測レコードから取る（既定の出力先があればそちらにも出す）
+        records.append(record)
+        if default is not None:
+            default(record)
+
+    t0 = perf_counter()
+    initiatives = extract_initiatives([_LocalFile(p) for p in files], workers=0, sink=keep)
+    t1 = perf_counter()
+    out = out_dir / f"{name}.pptx"
+    save_pptx(initiatives, out)
+    t2 = perf_counter()
+    return {
+        "bundle":      name,
+        "files":       len(files),
+        "items":       sum(records[0]["items"].values()) if records else 0,
+        "initiatives": len(initiatives),
+        "extract_s":   t1 - t0,
+        "generate_s":  t2 - t1,
+        "output":      str(out),
+    }
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="入力バンドルごとに施策スライド（.pptx）を生成する")
+    ap.add_argument("source", type=Path, help="バンドルのディレクトリ、またはマニフェスト(JSON)")
+    ap.add_argument("-o", "--out", type=Path, default=Path("out"), help="出力ディレクトリ")
+    ap.add_argument("-w", "--workers", type=int, default=1, help="同時に処理するバンドル数")
+    args = ap.parse_args(argv)
+
+    bundles = load_bundles(args.source)
+    if not bundles:
+        print(f"バンドルが見つかりません: {args.source}", file=sys.stderr)
+        return 1
+    args.out.mkdir(parents=True, exist_ok=True)
+
+    t0 = perf_counter()
+    failed = 0
+    with ProcessPoolExecutor(max_workers=max(1, args.workers)) as pool:
+        futures = {
+            name: pool.submit(run_bundle, name, files, args.out)
+            for name, files in bundles.items()
+        }
+        for name, fut in futures.items():
+            try:
+                r = fut.result()
+            except Exception as e:
+                failed += 1
+                print(f"NG  {name:<24} {e}", file=sys.stderr)
+                continue
+            print(f"OK  {r['bundle']:<24} files={r['files']:<3} items={r['items']:<5} "
+                  f"initiatives={r['initiatives']:<2} "
+                  f"extract={r['extract_s']:.2f}s generate={r['generate_s']:.2f}s  → {r['output']}")
+
+    print(f"{len(bundles) - failed}/{len(bundles)} バンドル完了  ({perf_counter() - t0:.2f}s)")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
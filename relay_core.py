@@ -0,0 +1,2108 @@
+# ==============================================================================
+# Project Relay — 施策抽出・PPTX生成エンジン
+#
+# Streamlit に依存しない部分（ファイル読み込み / 施策抽出 / スライド生成）。
+# app.py の UI のほか、バッチ処理・ベンチマークからそのまま import できる。
+# python-pptx / openpyxl / pdfplumber は、その形式を実際に扱う時点で読み込む。
+# ==============================================================================
+
+from __future__ import annotations
+
+import io
+import os
+import re
+import sys
+import json
+import mmap
+import logging
+import codecs
+import tempfile
+import heapq
+import hashlib
+import zipfile
+import posixpath
+import threading
+import importlib.util
+import multiprocessing
+from bisect import bisect_right
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from copy import deepcopy
+from datetime import datetime
+from functools import lru_cache
+from time import perf_counter
+from itertools import islice
+from typing import Iterator
+from pathlib import Path
+
+# ── Optional imports（有無だけ確認し、読み込みは使う時点で行う）────────────────
+PPTX_OK = importlib.util.find_spec("pptx") is not None
+XLSX_OK = importlib.util.find_spec("openpyxl") is not None
+PDF_OK  = importlib.util.find_spec("pdfplumber") is not None
+
+# ==============================================================================
+# ヘルパー関数 — テキスト処理
+# ==============================================================================
+
+_NOISE_CHARS = re.compile(r"^[\s\u3000\-=_■□◆◇▲▼●○★☆①-⑩〇|/\\～〜＝─━…・。、　]+$")
+_META_PAT    = re.compile(
+    r'^(第?\d+[ページ頁回期章節]|[Pp]\.?\s*\d+|slide\s*\d+|【.{1,8}】|\d{4}年\d{1,2}月.{0,4}$)',
+    re.IGNORECASE,
+)
+_DATE_ONLY   = re.compile(r'^\d{1,4}[年/\-]\d{1,2}[月/\-]\d{1,2}[日]?\s*$')
+_WS_RUN      = re.compile(r"[\s\u3000]+")
+
+# ── 4カテゴリ分類キーワード ─────────────────────────────────────────────────
+# WHEN   : 実施時期を示す表現
+# WHAT   : 実施内容・アクションを示す表現
+# RESULT : 結果・成果を示す表現（数値を含むものも優先）
+# INSIGHT: 気付き・共有トピック・ナレッジを示す表現
+
+WHEN_KW = [
+    "年度","上半期","下半期","Q1","Q2","Q3","Q4","第1四半期","第2四半期","第3四半期","第4四半期",
+    "今月","先月","来月","今週","先週","来週","今期","前期","来期",
+    "1月","2月","3月","4月","5月","6月","7月","8月","9月","10月","11月","12月",
+    "月初","月末","期末","期初","年末","年初",
+]
+WHAT_KW = [
+    "実施","施策","対応","対策","導入","展開","推進","構築","整備","強化","改善","改修",
+    "開始","着手","開発","設計","検討","協議","調整","計画","準備","移行","変更","修正",
+    "見直し","廃止","統合","分離","採用","運用","提案","承認","依頼","連携","共有","報告",
+]
+RESULT_KW = [
+    "達成","完了","解決","削減","向上","増加","減少","改善","成功","実現","完成","解消",
+    "前月比","前年比","前期比","前週比","比較","効果","成果","結果","件数","割合","率",
+    "%","％","万円","億円","千円","件","名","人","台","個","時間","日","週","ヶ月",
+    "▲","△","＋","+","-","倍","超","以上","以下","目標","KPI","予算","コスト","売上",
+]
+INSIGHT_KW = [
+    "気付き","学び","知見","教訓","ナレッジ","共有","展開","水平","横展開","再発防止","課題",
+    "注意","注意点","ポイント","工夫","改善点","次回","今後","継続","提案","推奨",
+    "ベストプラクティス","ノウハウ","留意","確認","考察","分析","原因","背景","要因","経緯",
+]
+
+
+# ── キーワード照合テーブル（_classify 用）───────────────────────────────────
+# 各キーワードを先頭文字で引けるようにし、テキスト中に現れる文字から候補だけを照合する。
+# 重みは (WHAT, RESULT, INSIGHT, WHEN) ごとの出現数（「改善」「共有」など複数カテゴリに属する語あり）
+def _build_kw_table(*groups: list[str]) -> dict[str, tuple[tuple[str, tuple[int, ...]], ...]]:
+    weights: dict[str, list[int]] = {}
+    for ci, kws in enumerate(groups):
+        for kw in kws:
+            weights.setdefault(kw, [0] * len(groups))[ci] += 1
+    table: dict[str, list] = {}
+    for kw, w in weights.items():
+        table.setdefault(kw[0], []).append((kw, tuple(w)))
+    return {ch: tuple(v) for ch, v in table.items()}
+
+
+_KW_TABLE = _build_kw_table(WHAT_KW, RESULT_KW, INSIGHT_KW, WHEN_KW)
+_KW_FIRST = frozenset(_KW_TABLE)
+_DIGIT    = re.compile(r'\d')
+
+
+def _kw_counts(text: str) -> tuple[int, int, int, int, bool]:
+    """
+    (WHAT数, RESULT数, INSIGHT数, WHEN数, 数値有無) を1回の走査で返す。
+    各数は sum(kw in text for kw in XXX_KW) と同じ値。
+    数値有無は _has_num と同じ値。
+    """
+    what = res = insight = when = 0
+    for ch in _KW_FIRST.intersection(text):
+        for kw, (w0, w1, w2, w3) in _KW_TABLE[ch]:
+            if kw in text:
+                what += w0; res += w1; insight += w2; when += w3
+    return what, res, insight, when, _DIGIT.search(text) is not None
+
+
+def _has_num(text: str) -> bool:
+    # 「20%」「300万円」「5件」などの数値表現はすべて数字を含むため、数字の有無で判定する
+    return _DIGIT.search(text) is not None
+
+
+def _is_noise(text: str) -> bool:
+    t = text.strip()
+    if len(t) <= 4 or len(t) > 400:       return True
+    if _NOISE_CHARS.match(t):              return True
+    if _META_PAT.match(t):                 return True
+    if _DATE_ONLY.match(t):                return True
+    return False
+
+
+# 類似度計算用の語（漢字2文字以上の連続）
+_KANJI_TERM = re.compile(r'[\u4e00-\u9fff]{2,}')
+
+
+# 日付パターン（WHEN検出に使用）
+_DATE_PAT = re.compile(
+    r'\d{4}[年/\-]\d{1,2}[月/\-]\d{1,2}[日]?'
+    r'|\d{4}/\d{2}/\d{2}'
+    r'|\d{1,2}月第\d週'
+    r'|\d{1,2}[月/\-]\d{1,2}[日]?'
+    r'|今月|先月|来月|今週|先週|来週|今期|前期|来期'
+    r'|\d{4}年\d{1,2}月'
+    r'|[123]月末|月初|期末|期初|年末|年初'
+    r'|上半期|下半期|Q[1-4]|第[1-4]四半期',
+    re.UNICODE,
+)
+
+# 実施時期の具体度（_when_score 用）: 年月日(4) > 年月(3) > 月/週番号(2) > 相対表現(1)
+_WHEN_SCORES = (
+    (4, re.compile(r'\d{4}[年/]\d{1,2}[月/]\d{1,2}')),
+    (3, re.compile(r'\d{4}年\d{1,2}月')),
+    (2, re.compile(r'\d{1,2}[月/]\d{1,2}|\d{1,2}月第\d週')),
+)
+
+# ソース表記の分解
+#   _SRC_KEY_SPLIT : 同一ファイル判定用（空白・「スライド」「行」「シート」「p」の文字で区切った先頭）
+#   _SRC_FILE_SPLIT: 表示用ファイル名（「report.pptx スライド3」→「report.pptx」）
+_SRC_KEY_SPLIT  = re.compile(r'[ \u30b9\u30e9\u30a4\u30c9\u884c\u30b7\u30fc\u30c8p]')
+_SRC_FILE_SPLIT = re.compile(r'\s+(?:スライド|シート|p\.|ページ|行)\d+')
+
+
+def _when_score(date_hint: str) -> int:
+    """日付表現の具体度（空文字なら0）"""
+    if not date_hint:
+        return 0
+    for score, pat in _WHEN_SCORES:
+        if pat.search(date_hint):
+            return score
+    return 1
+
+
+def _classify(text: str) -> str:
+    """
+    テキストを WHEN / WHAT / RESULT / INSIGHT の4カテゴリに分類する。
+
+    優先順:
+      1. RESULT  — 数値＋結果キーワードが最も強いシグナル
+      2. INSIGHT — 気付き・共有系キーワード
+      3. WHEN    — 日付・時期表現（テキスト全体が時期情報の場合）
+      4. WHAT    — 実施内容（デフォルト）
+    """
+    what, res, insight, _, has_n = _kw_counts(text)
+
+    # 数値を含む結果表現 → RESULT
+    if has_n and res >= 1:                    return "RESULT"
+    # 結果キーワードが2つ以上 → RESULT
+    if res >= 2:                              return "RESULT"
+    # INSIGHT キーワードが多い → INSIGHT
+    if insight >= 2 and insight > what:       return "INSIGHT"
+    # 実施内容キーワードが1つ以上 → WHAT
+    if what >= 1:                             return "WHAT"
+    # 残り → WHAT（デフォルト）
+    return "WHAT"
+
+
+def _shorten(raw: str, max_chars: int = 52) -> str:
+    t = raw.strip()
+    t = _WS_RUN.sub(" ", t).strip()
+    if len(t) <= max_chars:
+        return t
+    cut = t[:max_chars]
+    for sep in ["。", "、", "）", "】"]:
+        idx = cut.rfind(sep)
+        if idx > max_chars // 2:
+            return cut[:idx + 1]
+    return cut + "…"
+
+
+# ==============================================================================
+# ファイル読み込みエンジン
+# ==============================================================================
+
+TXT_SAMPLE_BYTES = 64 * 1024     # 文字コード判定に使う先頭バイト数
+TXT_CHUNK_BYTES  = 1024 * 1024   # テキストを行境界で区切って1回にデコードする量
+
+# リーダーが受け取るファイル内容（data）は bytes か、スプールした一時ファイルの Path。
+# Path の場合はファイルを直接開くか mmap で参照し、内容をメモリへ複製しない。
+
+
+def _as_file(data: bytes | Path):
+    """zipfile / pdfplumber / openpyxl に渡す形（Path はそのまま、bytes はメモリ上のストリーム）"""
+    return data if isinstance(data, Path) else io.BytesIO(data)
+
+
+@contextmanager
+def _as_buffer(data: bytes | Path):
+    """bytes 互換のバッファ（Path は読み取り専用の mmap）。with を抜けると mmap を閉じる"""
+    if not isinstance(data, Path):
+        yield data
+        return
+    with open(data, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            yield b""
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            yield mm
+
+# リーダーは (本文, ソース) の行を1つずつ返すジェネレータ。
+# ファイル全体の行リストは作らず、後段（ノイズ除去 → 分類 → 振り分け）へそのまま流す。
+
+_NS_P   = "{http://schemas.openxmlformats.org/presentationml/2006/main}"
+_NS_A   = "{http://schemas.openxmlformats.org/drawingml/2006/main}"
+_NS_R   = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+_RT_DOC = "http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument"
+
+
+def _zip_rels(zf: zipfile.ZipFile, part: str) -> dict[str, tuple[str, str]]:
+    """part の .rels を読み、rId → (種類, 絶対パート名) を返す"""
+    from lxml import etree
+    base, name = posixpath.split(part)
+    root = etree.fromstring(zf.read(posixpath.join(base, "_rels", f"{name}.rels")))
+    rels = {}
+    for rel in root:
+        target = rel.get("Target", "")
+        if target.startswith("/"):
+            target = target[1:]
+        else:
+            target = posixpath.normpath(posixpath.join(base, target))
+        rels[rel.get("Id")] = (rel.get("Type"), target)
+    return rels
+
+
+def _pptx_slide_parts(zf: zipfile.ZipFile) -> list[str]:
+    """presentation.xml の sldIdLst の順（= スライド番号順）にスライドのパート名を返す"""
+    from lxml import etree
+    pres = next(t for typ, t in _zip_rels(zf, "").values() if typ == _RT_DOC)
+    rels = _zip_rels(zf, pres)
+    root = etree.fromstring(zf.read(pres))
+    return [rels[sid.get(f"{_NS_R}id")][1]
+            for sid in root.iterfind(f"{_NS_P}sldIdLst/{_NS_P}sldId")]
+
+
+def _pptx_paragraphs(stream) -> Iterator[str]:
+    """
+    スライド XML から、spTree 直下の図形（p:sp）のテキスト段落を文書順に返す。
+    python-pptx の sl.shapes → text_frame.paragraphs → paragraph.text と同じ範囲・同じ文字列
+    （グループ内の図形・表は対象外、a:br は "\v"）。処理済みの図形は都度破棄する。
+    """
+    from lxml import etree
+    sp_tree, tx_body, para = f"{_NS_P}spTree", f"{_NS_P}txBody", f"{_NS_A}p"
+    run_tags = (f"{_NS_A}r", f"{_NS_A}fld")
+    br, t_tag = f"{_NS_A}br", f"{_NS_A}t"
+    for _, sp in etree.iterparse(stream, events=("end",), tag=f"{_NS_P}sp"):
+        parent = sp.getparent()
+        if parent.tag == sp_tree:
+            body = sp.find(tx_body)
+            if body is not None:
+                for pa in body.iterfind(para):
+                    yield "".join(
+                        (c.findtext(t_tag) or "") if c.tag in run_tags else "\v"
+                        for c in pa if c.tag in run_tags or c.tag == br
+                    )
+            sp.clear(keep_tail=True)
+            while sp.getprevious() is not None:
+                del parent[0]
+
+
+def _rd_pptx(fb: bytes | Path, nm: str) -> Iterator[tuple[str, str]]:
+    # python-pptx でパッケージ全体（画像などを含む）を組み立てず、
+    # スライドの XML だけを zip から順にストリームで読む
+    try:
+        with zipfile.ZipFile(_as_file(fb)) as zf:
+            for i, part in enumerate(_pptx_slide_parts(zf), 1):
+                with zf.open(part) as stream:
+                    for pa in _pptx_paragraphs(stream):
+                        t = pa.strip()
+                        if t and len(t) > 4:
+                            yield t, f"{nm} スライド{i}"
+    except Exception as e:
+        yield f"読み込みエラー: {e}", nm
+
+
+def _rd_xlsx(fb: bytes | Path, nm: str) -> Iterator[tuple[str, str]]:
+    import openpyxl
+    # read_only + values_only: セルオブジェクトを作らず行の値だけをストリームで読む
+    try:
+        wb = openpyxl.load_workbook(_as_file(fb), read_only=True, data_only=True)
+    except Exception as e:
+        yield f"読み込みエラー: {e}", nm
+        return
+    try:
+        for sn in wb.sheetnames:
+            for row in wb[sn].iter_rows(values_only=True):
+                # 数値・日付の str() は前後に空白を含まないため strip は文字列セルだけ
+                cells = [v.strip() if isinstance(v, str) else str(v) for v in row if v is not None]
+                if cells:
+                    t = " | ".join(cells)
+                    if len(t) > 4:
+                        yield t, f"{nm} {sn}"
+    except Exception as e:
+        yield f"読み込みエラー: {e}", nm
+    finally:
+        wb.close()
+
+
+def _rd_pdf(fb: bytes | Path, nm: str) -> Iterator[tuple[str, str]]:
+    """ページ単位のキャッシュ・並列抽出は _pdf_pages を参照"""
+    import pdfplumber
+    try:
+        with pdfplumber.open(_as_file(fb)) as pdf:
+            for t, label in _pdf_pages(pdf, fb):
+                yield t, f"{nm} {label}"
+    except Exception as e:
+        yield f"読み込みエラー: {e}", nm
+
+
+_TXT_ENCODINGS = ("utf-8", "shift-jis", "cp932", "utf-16", "latin-1")   # 判定の優先順
+_TXT_BOMS = ((codecs.BOM_UTF8, "utf-8-sig"),
+             (codecs.BOM_UTF16_LE, "utf-16"), (codecs.BOM_UTF16_BE, "utf-16"))
+
+
+def _sniff_encoding(fb, start: int = 0, skip=()) -> str | None:
+    """
+    先頭の BOM、なければ start から TXT_SAMPLE_BYTES 分の試しデコードで文字コードを決める。
+    サンプル末尾で切れたマルチバイト文字はエラーにしない。
+    BOM なしの utf-16 は ASCII 互換でなく途中から判定できないため、bytes.decode と同じく
+    全体をネイティブのバイト順でデコードできるかで判定する（start > 0 では候補にしない）。
+    """
+    if start == 0:
+        for bom, enc in _TXT_BOMS:
+            if fb[:len(bom)] == bom:
+                return enc
+    sample = fb[start:start + TXT_SAMPLE_BYTES]
+    final  = start + len(sample) >= len(fb)
+    for enc in _TXT_ENCODINGS:
+        if enc in skip:
+            continue
+        try:
+            if enc == "utf-16":
+                if start:
+                    continue
+                str(fb, enc)
+            else:
+                codecs.getincrementaldecoder(enc)().decode(sample, final)
+        except UnicodeError:
+            continue
+        return enc
+    return None
+
+
+def _rd_txt(fb: bytes | Path, nm: str) -> Iterator[tuple[str, str]]:
+    # 文字コードは一度だけ判定し、行境界で区切った TXT_CHUNK_BYTES ずつデコードする
+    # （ファイル全体のデコード結果を持たない）。サンプルより後ろで判定した文字コードでは
+    # 読めない行が出た場合は、その行から先を判定し直して続ける。
+    with _as_buffer(fb) as buf:
+        enc = _sniff_encoding(buf)
+        if enc is None:
+            yield "文字コードを特定できませんでした", nm
+            return
+        if enc == "utf-16":
+            # ASCII 互換でない（改行バイトで区切れない）ため全体をまとめてデコードする
+            texts: Iterator[str] = iter([str(buf, enc)])
+        else:
+            texts = _iter_decoded(buf, enc)
+        try:
+            for text in texts:
+                for line in text.split("\n"):
+                    t = line.strip()
+                    if t and len(t) > 4:
+                        yield t, nm
+        except UnicodeDecodeError:
+            yield "文字コードを特定できませんでした", nm
+
+
+def _iter_decoded(fb, enc: str) -> Iterator[str]:
+    """ASCII 互換の文字コードで、行境界に揃えたチャンクを順にデコードして返す"""
+    n = len(fb)
+    pos = 3 if enc == "utf-8-sig" else 0
+    enc = "utf-8" if enc == "utf-8-sig" else enc
+    tried = {enc, "utf-16"}
+    while pos < n:
+        cut = min(n, pos + TXT_CHUNK_BYTES)
+        if cut < n:
+            nl  = fb.rfind(b"\n", pos, cut)
+            nl  = nl if nl >= 0 else fb.find(b"\n", cut)
+            cut = n if nl < 0 else nl + 1
+        try:
+            with memoryview(fb) as view, view[pos:cut] as chunk:
+                text = str(chunk, enc)
+        except UnicodeDecodeError as e:
+            # 読めた行までを返し、読めなかった行から文字コードを判定し直す
+            line = max(pos, fb.rfind(b"\n", pos, pos + e.start) + 1)
+            if line > pos:
+                with memoryview(fb) as view, view[pos:line] as chunk:
+                    text = str(chunk, enc)
+                yield text
+            pos = line
+            enc = _sniff_encoding(fb, pos, tried)
+            if enc is None:
+                raise
+            tried.add(enc)
+        else:
+            yield text
+            pos = cut
+
+
+def _iter_kept(reader, fb: bytes | Path, nm: str) -> Iterator[tuple[str, str]]:
+    """読み込み → ノイズ除去"""
+    for orig, src in reader(fb, nm):
+        if not _is_noise(orig):
+            yield orig, src
+
+
+def _iter_kept_traced(reader, fb: bytes | Path, nm: str, stat: dict) -> Iterator[tuple[str, str]]:
+    """_iter_kept と同じ行を返しつつ、読み込み・ノイズ除去それぞれの秒数と行数を stat に記録する"""
+    rows = iter(reader(fb, nm))
+    read_s = noise_s = 0.0
+    raw = kept = 0
+    try:
+        while True:
+            t0 = perf_counter()
+            row = next(rows, None)
+            t1 = perf_counter()
+            read_s += t1 - t0
+            if row is None:
+                return
+            raw += 1
+            noise = _is_noise(row[0])
+            noise_s += perf_counter() - t1
+            if not noise:
+                kept += 1
+                yield row
+    finally:
+        stat.update(seconds=read_s, noise_seconds=noise_s, raw_lines=raw, lines=kept)
+
+
+def _read_kept(reader, fb: bytes | Path, nm: str,
+               traced: bool = False) -> list[tuple[str, str]] | tuple[list, dict]:
+    """
+    プロセスプール用: ノイズ除去後の行だけをリストで返す。
+    traced=True なら (行のリスト, _iter_kept_traced の stat) を返す。
+    """
+    if not traced:
+        return list(_iter_kept(reader, fb, nm))
+    stat: dict = {}
+    return list(_iter_kept_traced(reader, fb, nm, stat)), stat
+
+
+# ==============================================================================
+# パース結果キャッシュ — ファイル内容のハッシュで読み込み結果を再利用
+# ==============================================================================
+
+PARSE_CACHE_MAX_BYTES = 64 * 1024 * 1024                     # メモリ層の上限（テキスト量）
+PARSE_CACHE_DIR       = os.environ.get("RELAY_PARSE_CACHE_DIR", "")   # 空ならディスク層なし
+PARSE_CACHE_DISK_MAX_BYTES = int(os.environ.get("RELAY_PARSE_CACHE_DISK_MAX_BYTES",
+                                                str(512 * 1024 * 1024)))  # ディスク層ごとの上限（0 なら無制限）
+READ_WORKERS          = int(os.environ.get("RELAY_READ_WORKERS", "0"))  # 1以下なら直列読み込み
+# （2以上では PDF のページキャッシュがワーカーごとになる。_pdf_pages を参照）
+
+
+class _ParseCache:
+    """
+    ノイズ除去後の行 (本文, ソース) を sha256(ファイル内容 + ファイル名) をキーに保持する。
+
+    - メモリ層: LRU。保持テキスト量の合計が max_bytes を超えたら古い順に破棄
+    - ディスク層: disk_dir 指定時のみ。キーごとに JSON を1ファイル保存。ファイルの合計が
+      disk_max_bytes を超えたら更新時刻の古い順に削除する（読み込んだファイルは更新時刻を更新）
+    - stats: hits / disk_hits / misses / evictions / disk_evictions（動作確認用）
+    """
+
+    def __init__(self, max_bytes: int, disk_dir: str | None = None, disk_max_bytes: int = 0):
+        self.max_bytes = max_bytes
+        self.disk_dir  = Path(disk_dir) if disk_dir else None
+        self.disk_max_bytes = disk_max_bytes
+        self._mem: OrderedDict[str, tuple[tuple[tuple[str, str], ...], int]] = OrderedDict()
+        self._size = 0
+        self._disk_size: int | None = None   # ディスク層の推定使用量（None なら次の書き込みで数える）
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0, "disk_evictions": 0}
+        if self.disk_dir:
+            self.disk_dir.mkdir(parents=True, exist_ok=True)
+
+    VERSION = b"kept-v4"   # 保持する行の形式を変えたら更新（ディスク層の旧データを無効化）
+
+    @staticmethod
+    def key(fb: bytes | Path, nm: str) -> str:
+        # ソース表記にファイル名が入るため、名前もキーに含める
+        h = hashlib.sha256(_ParseCache.VERSION)
+        with _as_buffer(fb) as buf:
+            h.update(buf)
+        h.update(b"\0" + nm.encode("utf-8"))
+        if nm.lower().endswith(".pdf"):
+            # PDF は抽出モードで行の並び・まとまりが変わるため、モードごとに別のエントリにする
+            h.update(b"\0pdf-mode=" + PDF_TEXT_MODE.encode("utf-8"))
+        return h.hexdigest()
+
+    def get(self, key: str, tally: dict | None = None) -> tuple[tuple[str, str], ...] | None:
+        """tally: 渡された場合、stats と同じ hits / disk_hits / misses をこの dict にも数える"""
+        with self._lock:
+            hit = self._mem.get(key)
+            if hit is not None:
+                self._mem.move_to_end(key)
+                self._count("hits", tally)
+                return hit[0]
+        rows = self._disk_get(key)
+        with self._lock:
+            if rows is None:
+                self._count("misses", tally)
+                return None
+            self._count("disk_hits", tally)
+            self._mem_put(key, rows)
+        return rows
+
+    def put(self, key: str, rows) -> None:
+        rows = tuple(rows)
+        with self._lock:
+            self._mem_put(key, rows)
+        self._disk_put(key, rows)
+
+    def clear(self) -> None:
+        """メモリ層を空にする（ディスク層は残す）"""
+        with self._lock:
+            self._mem.clear()
+            self._size = 0
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return dict(self.stats, entries=len(self._mem), bytes=self._size)
+
+    # ── 内部 ──
+    def _count(self, name: str, tally: dict | None) -> None:
+        self.stats[name] += 1
+        if tally is not None:
+            tally[name] = tally.get(name, 0) + 1
+
+    def _mem_put(self, key, rows) -> None:
+        size = sum(len(o) + len(s) for o, s in rows)
+        old = self._mem.pop(key, None)
+        if old is not None:
+            self._size -= old[1]
+        if size > self.max_bytes:
+            return
+        self._mem[key] = (rows, size)
+        self._size += size
+        while self._size > self.max_bytes:
+            _, (_, sz) = self._mem.popitem(last=False)
+            self._size -= sz
+            self.stats["evictions"] += 1
+
+    def _disk_get(self, key):
+        if not self.disk_dir:
+            return None
+        path = self.disk_dir / f"{key}.json"
+        try:
+            data = json.loads(path.read_text("utf-8"))
+            rows = tuple((o, s) for o, s in data)
+        except (OSError, ValueError, TypeError):
+            return None
+        if self.disk_max_bytes:
+            try:
+                os.utime(path)   # 削除の順番を「最後に使った順」にする
+            except OSError:
+                pass
+        return rows
+
+    def _disk_put(self, key, rows) -> None:
+        if not self.disk_dir:
+            return
+        path = self.disk_dir / f"{key}.json"
+        tmp  = path.with_suffix(f".{threading.get_ident()}.tmp")
+        data = json.dumps(rows, ensure_ascii=False).encode("utf-8")
+        try:
+            tmp.write_bytes(data)
+            os.replace(tmp, path)
+        except OSError:
+            tmp.unlink(missing_ok=True)
+            return
+        if not self.disk_max_bytes:
+            return
+        with self._lock:
+            # 推定量は書き込みごとに足すだけにし、上限を超えたときだけ実際の量を数え直す
+            # （ワーカープロセスなど他の書き手の分もそのときに反映される）
+            if self._disk_size is None:
+                self._disk_size = self._disk_trim(self.disk_max_bytes)
+            else:
+                self._disk_size += len(data)
+            if self._disk_size > self.disk_max_bytes:
+                self._disk_size = self._disk_trim(self.disk_max_bytes * 9 // 10)
+
+    def _disk_trim(self, limit: int) -> int:
+        """ディスク層の合計が limit 以下になるまで古いファイルを削除し、残った合計を返す"""
+        files = []
+        for p in self.disk_dir.glob("*.json"):
+            try:
+                st = p.stat()
+            except OSError:
+                continue
+            files.append((st.st_mtime, st.st_size, p))
+        files.sort()
+        total = sum(size for _, size, _ in files)
+        for _, size, p in files:
+            if total <= limit:
+                break
+            try:
+                p.unlink()
+            except OSError:
+                continue
+            total -= size
+            self.stats["disk_evictions"] += 1
+        return total
+
+
+@lru_cache(maxsize=None)
+def _parse_cache() -> _ParseCache:
+    """プロセス内で共有するキャッシュ（全セッション・スクリプト再実行をまたいで保持）"""
+    return _ParseCache(PARSE_CACHE_MAX_BYTES, PARSE_CACHE_DIR or None, PARSE_CACHE_DISK_MAX_BYTES)
+
+
+def parse_cache_stats() -> dict:
+    """パースキャッシュの累計 hits / disk_hits / misses / evictions と保持量"""
+    return _parse_cache().snapshot()
+
+
+def _process_pool(workers: int) -> ProcessPoolExecutor:
+    """
+    ワーカープロセスを fork ではなく forkserver（なければ spawn）で起動するプール。
+    Streamlit やジョブのスレッドがロックを持ったまま fork すると子プロセスが固まりうるため、
+    スレッドを持たない forkserver から子を作る。
+    """
+    method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context(method))
+
+
+@lru_cache(maxsize=None)
+def _read_pool(workers: int) -> ProcessPoolExecutor:
+    """ファイル読み込み用のプロセスプール（ワーカー数ごとに1つ・全セッション共有）"""
+    return _process_pool(workers)
+
+
+def _iter_rows(jobs: list[tuple], workers: int, on_file=None,
+               stats: list[dict] | None = None, tally: dict | None = None) -> Iterator[tuple[str, str]]:
+    """
+    (reader, data, name) のリストを読み込み、ノイズ除去後の行をファイルの入力順に返す。
+    キャッシュ済みのものは再利用し、未キャッシュ分が2件以上かつ workers > 1 なら
+    プロセスプールで並列に読み込む（スプール済みの data はパスだけを渡す）。
+    読み込みに失敗したファイルは読み飛ばす。
+    on_file: 渡された場合、1ファイル読み終えるごとに on_file(読み終えた件数) を呼ぶ。
+    stats:   渡された場合、ファイルごとの計測（_file_stat）を入力順に追加する。
+    tally:   渡された場合、キャッシュの hits / disk_hits / misses を数える（_ParseCache.get）。
+    """
+    cache = _parse_cache()
+    keys  = [cache.key(fb, nm) for _, fb, nm in jobs]
+    hits  = [cache.get(k, tally) for k in keys]
+    todo  = [i for i, r in enumerate(hits) if r is None]
+    traced = stats is not None
+
+    futures = {}
+    if workers > 1 and len(todo) > 1:
+        pool = _read_pool(workers)
+        futures = {i: pool.submit(_read_kept, *jobs[i], traced) for i in todo}
+
+    for i, job in enumerate(jobs):
+        if i and on_file is not None:
+            on_file(i)
+        reader, fb, nm = job
+        stat = _file_stat(fb, nm, hits[i]) if traced else None
+        if stat is not None:
+            stats.append(stat)
+        if hits[i] is not None:
+            yield from hits[i]
+            continue
+        if i in futures:
+            try:
+                rows = futures[i].result()
+            except Exception:
+                # プールが壊れた場合などはこのプロセスで読み直す
+                try:
+                    rows = _read_kept(reader, fb, nm, traced)
+                except Exception:
+                    if stat is not None:
+                        stat["failed"] = True
+                    continue
+            if stat is not None:
+                rows, worker_stat = rows
+                stat.update(worker_stat)
+            yield from rows
+        else:
+            rows = []
+            it = (_iter_kept(reader, fb, nm) if stat is None
+                  else _iter_kept_traced(reader, fb, nm, stat))
+            try:
+                for row in it:
+                    rows.append(row)
+                    yield row
+            except Exception:
+                if stat is not None:
+                    stat["failed"] = True
+                continue
+        cache.put(keys[i], rows)
+    if jobs and on_file is not None:
+        on_file(len(jobs))
+
+
+def _file_stat(fb: bytes | Path, nm: str, hit: list | None) -> dict:
+    """_iter_rows の stats に入れる1ファイル分の計測の初期値（キャッシュ命中なら行数のみ）"""
+    try:
+        size = fb.stat().st_size if isinstance(fb, Path) else len(fb)
+    except OSError:
+        size = 0
+    return {
+        "file": nm, "reader": Path(nm).suffix.lower().lstrip("."), "bytes": size,
+        "cached": hit is not None, "failed": False,
+        "seconds": 0.0, "noise_seconds": 0.0,
+        "raw_lines": 0, "lines": len(hit) if hit is not None else 0,
+    }
+
+
+# ==============================================================================
+# PDF ページ単位の読み込み — ページキャッシュとページ範囲の並列抽出
+# ==============================================================================
+
+PDF_PAGE_CACHE_MAX_BYTES = 32 * 1024 * 1024                      # ページキャッシュの上限（テキスト量）
+PDF_WORKERS              = int(os.environ.get("RELAY_PDF_WORKERS", "0"))  # 1以下ならページを直列抽出
+PDF_SHARD_MIN_PAGES      = 8     # 未キャッシュのページがこれ未満なら分割しない
+PDF_TEXT_MODE            = os.environ.get("RELAY_PDF_MODE", "layout")  # layout / fast（fast は行の並びが変わりうる）
+PDF_LINE_TOL             = 3.0   # 同じ行とみなすベースラインの差・空白を入れる文字間隔（pt）
+_PDF_PAGE_VERSION        = b"pdf-page-v3"
+
+
+@lru_cache(maxsize=None)
+def _page_cache() -> _ParseCache:
+    """
+    PDF のページごとの行 (本文, "p.N") を保持するキャッシュ（ファイル名は含めない）。
+    ディスク層は PARSE_CACHE_DIR/pdf_pages に置く。
+    """
+    disk = str(Path(PARSE_CACHE_DIR) / "pdf_pages") if PARSE_CACHE_DIR else None
+    return _ParseCache(PDF_PAGE_CACHE_MAX_BYTES, disk, PARSE_CACHE_DISK_MAX_BYTES)
+
+
+def _pdf_doc_id(pdf) -> bytes:
+    """
+    トレーラーの /ID（先頭要素）。追記（増分更新）しても変わらない文書の識別子。
+    /ID のない PDF は空（ページ内容のハッシュだけで区別する）。
+    """
+    from pdfminer.pdftypes import resolve1
+    for xref in pdf.doc.xrefs:
+        ids = resolve1((xref.get_trailer() or {}).get("ID"))
+        if ids:
+            first = resolve1(ids[0])
+            return first if isinstance(first, bytes) else b""
+    return b""
+
+
+def _pdf_obj_digest(obj, memo: dict, active: frozenset = frozenset()) -> bytes:
+    """
+    PDF オブジェクトを参照先までたどった内容のハッシュ（フォントの Encoding / ToUnicode、
+    XObject のストリームなどを含む）。間接参照の結果は memo（文書ごと）に objid で保持する。
+    """
+    from pdfminer.pdftypes import PDFObjRef, PDFStream
+    from pdfminer.psparser import PSLiteral, PSKeyword
+    if isinstance(obj, PDFObjRef):
+        oid = obj.objid
+        d = memo.get(oid)
+        if d is None:
+            if oid in active:                     # 循環参照は参照番号だけにする
+                return b"ref%d" % oid
+            d = memo[oid] = _pdf_obj_digest(obj.resolve(), memo, active | {oid})
+        return d
+    h = hashlib.sha256()
+    if isinstance(obj, PDFStream):
+        h.update(b"S" + _pdf_obj_digest(obj.attrs, memo, active))
+        # デコード済みのストリームは rawdata が消えるため、その場合はデコード後の内容を使う
+        # （どちらかで区別して混同しない。同じ内容でも別キーになるのはキャッシュを外すだけ）
+        raw = obj.get_rawdata()
+        h.update(b"R" + raw if raw is not None else b"D" + (obj.data or b""))
+    elif isinstance(obj, dict):
+        h.update(b"D")
+        for k in sorted(obj, key=str):
+            h.update(str(k).encode("utf-8") + b"\0" + _pdf_obj_digest(obj[k], memo, active))
+    elif isinstance(obj, (list, tuple)):
+        h.update(b"L")
+        for v in obj:
+            h.update(_pdf_obj_digest(v, memo, active))
+    elif isinstance(obj, (PSLiteral, PSKeyword)):
+        h.update(b"N" + repr(obj.name).encode("utf-8"))
+    else:
+        h.update(b"V" + repr(obj).encode("utf-8"))
+    return h.digest()
+
+
+def _pdf_page_key(doc_id: bytes, i: int, pg, mode: str, memo: dict | None = None) -> str:
+    """
+    抽出モード + 文書 ID + ページ番号 + ページ内容のハッシュ。内容はコンテンツストリームと、
+    参照先まで解決したリソース（_pdf_obj_digest）・用紙。/ID のない別の文書でも、
+    ストリームが同じでフォントの符号化が違えば別のキーになる。
+    memo: 同じ文書のページ間で共有するフォントなどのハッシュ（_pdf_obj_digest）
+    """
+    from pdfminer.pdftypes import resolve1
+    obj = pg.page_obj
+    h = hashlib.sha256(_PDF_PAGE_VERSION)
+    h.update(mode.encode("ascii") + b"\0")
+    h.update(doc_id)
+    h.update(b"\0%d\0" % i)
+    for c in obj.contents:
+        h.update(resolve1(c).get_rawdata() or b"")
+    h.update(_pdf_obj_digest(obj.resources, {} if memo is None else memo))
+    h.update(repr((obj.mediabox, obj.rotate)).encode("utf-8"))
+    return h.hexdigest()
+
+
+@lru_cache(maxsize=1)
+def _line_device_cls():
+    """
+    fast モード用の pdfminer デバイス。
+    文字ごとの LTChar 生成とレイアウト解析を行わず、コンテンツストリームの描画順に
+    ベースラインが変わった所で行を区切る（行の並べ替え・段組みの解析はしない）。
+    """
+    from pdfminer.pdfdevice import PDFTextDevice
+    from pdfminer.pdffont import PDFUnicodeNotDefined
+
+    class _LineDevice(PDFTextDevice):
+        def __init__(self, rsrcmgr):
+            super().__init__(rsrcmgr)
+            self.lines: list[str] = []
+            self._buf: list[str] = []
+            self._base = None     # 現在の行のベースライン（縦書きなら x 座標）
+            self._end  = 0.0      # 直前の文字の終端位置
+
+        def render_char(self, matrix, font, fontsize, scaling, rise, cid, ncs, graphicstate):
+            try:
+                text = font.to_unichr(cid)
+            except PDFUnicodeNotDefined:
+                text = f"(cid:{cid})"
+            adv = font.char_width(cid) * fontsize * scaling
+            a, _, _, d, e, f = matrix
+            base, pos, step = (e, f, d) if font.is_vertical() else (f, e, a)
+            if self._base is None or abs(base - self._base) > PDF_LINE_TOL:
+                self.flush()
+                self._base = base
+            elif abs(pos - self._end) > PDF_LINE_TOL:
+                self._buf.append(" ")
+            self._buf.append(text)
+            self._end = pos + adv * step
+            return adv
+
+        def flush(self) -> None:
+            if self._buf:
+                self.lines.append("".join(self._buf))
+                self._buf = []
+
+    return _LineDevice
+
+
+def _pdf_page_lines_fast(pg) -> list[str]:
+    """fast モード: pdfplumber と同じリソースマネージャで、行テキストだけを取り出す"""
+    from pdfminer.pdfinterp import PDFPageInterpreter
+    rsrcmgr = pg.pdf.rsrcmgr
+    device  = _line_device_cls()(rsrcmgr)
+    PDFPageInterpreter(rsrcmgr, device).process_page(pg.page_obj)
+    device.flush()
+    return device.lines
+
+
+def _pdf_page_rows(pg, i: int, mode: str) -> tuple[tuple[str, str], ...]:
+    """
+    1ページ分の行 (本文, "p.N")。
+    mode="layout" は pdfplumber の extract_text（文字単位のレイアウト解析あり・上から下へ整列）、
+    mode="fast" は _pdf_page_lines_fast（描画順・レイアウト解析なし）。
+    """
+    lines = _pdf_page_lines_fast(pg) if mode == "fast" else (pg.extract_text() or "").split("\n")
+    rows = []
+    for line in lines:
+        t = line.strip()
+        if t and len(t) > 4:
+            rows.append((t, f"p.{i}"))
+    return tuple(rows)
+
+
+def _pdf_extract_pages(fb: bytes | Path, pages: list[int], mode: str) -> list[tuple[int, tuple]]:
+    """プロセスプール用: 指定ページ（1始まり）だけを開いて抽出する（Path ならワーカーが直接開く）"""
+    import pdfplumber
+    with pdfplumber.open(_as_file(fb), pages=pages) as pdf:
+        return [(pg.page_number, _pdf_page_rows(pg, pg.page_number, mode)) for pg in pdf.pages]
+
+
+def _pdf_pages(pdf, fb: bytes | Path, mode: str | None = None) -> Iterator[tuple[str, str]]:
+    """
+    開いた PDF の行 (本文, "p.N") をページ順に返す（mode は _pdf_page_rows、None なら PDF_TEXT_MODE）。
+    キャッシュ済みのページは再利用し、未キャッシュのページが PDF_SHARD_MIN_PAGES 以上かつ
+    PDF_WORKERS > 1 なら、連続したページ範囲に分けてプロセスプールで抽出する。
+    ワーカープロセス内（ファイル単位の並列読み込み中）ではさらに分割しない。
+    ページキャッシュ（_page_cache）はプロセスごとに持つ。READ_WORKERS > 1 で PDF をワーカーが
+    読む場合、ページを再利用できるのは同じワーカーが以前に読んだページか、ディスク層
+    （RELAY_PARSE_CACHE_DIR/pdf_pages）にあるページだけ。追記した PDF の再アップロードで
+    新しいページだけを抽出させるには、直列読み込みにするかディスク層を有効にする。
+    """
+    mode  = mode or PDF_TEXT_MODE
+    cache = _page_cache()
+    pages = pdf.pages
+    doc_id = _pdf_doc_id(pdf)
+    memo: dict = {}
+    keys  = [_pdf_page_key(doc_id, i, pg, mode, memo) for i, pg in enumerate(pages, 1)]
+    hits  = [cache.get(k) for k in keys]
+    todo  = [i for i, r in enumerate(hits, 1) if r is None]
+
+    shard_of: dict[int, object] = {}
+    if (PDF_WORKERS > 1 and len(todo) >= PDF_SHARD_MIN_PAGES
+            and multiprocessing.parent_process() is None):
+        size = -(-len(todo) // PDF_WORKERS)
+        pool = _read_pool(PDF_WORKERS)
+        for k in range(0, len(todo), size):
+            shard = todo[k:k + size]
+            fut = pool.submit(_pdf_extract_pages, fb, shard, mode)
+            for i in shard:
+                shard_of[i] = fut
+
+    done: dict[int, tuple] = {}
+    for i, pg in enumerate(pages, 1):
+        rows = hits[i - 1]
+        if rows is None:
+            fut = shard_of.get(i)
+            if fut is not None and i not in done:
+                try:
+                    done.update(fut.result())
+                except Exception:
+                    # プールが壊れた場合などはこのプロセスで抽出する
+                    shard_of = {}
+            rows = done.pop(i, None)
+            if rows is None:
+                rows = _pdf_page_rows(pg, i, mode)
+            cache.put(keys[i - 1], rows)
+        yield from rows
+
+
+# ==============================================================================
+# アップロードのスプール — 大きなファイルは一時ファイルに書き出してパスで読む
+# ==============================================================================
+
+SPOOL_MIN_BYTES = int(os.environ.get("RELAY_SPOOL_MIN_BYTES", str(8 * 1024 * 1024)))  # これ以上はスプール
+SPOOL_DIR       = os.environ.get("RELAY_SPOOL_DIR", "")   # 空なら OS の一時ディレクトリ
+
+
+def _spool(uf, spooled: list[Path]) -> bytes | Path:
+    """
+    アップロード1件の内容を、リーダーに渡す data（bytes または Path）にする。
+    - path 属性があるもの（バッチ処理のローカルファイル）はそのパスを使う
+    - SPOOL_MIN_BYTES 未満は bytes のまま
+    - それ以上は一時ファイルへ書き出して Path を返す。以降はワーカーへもパスだけを渡し、
+      bytes を複製しない。作ったファイルは spooled に追加し、呼び出し側が削除する
+    """
+    path = getattr(uf, "path", None)
+    if path is not None:
+        return Path(path)
+    # io.BytesIO（Streamlit の UploadedFile）の read / getvalue は内部の bytes を共有する
+    # （getbuffer は共有を解くため全体が複製される）
+    data = uf.read()
+    if len(data) < SPOOL_MIN_BYTES:
+        return data
+    fd, name = tempfile.mkstemp(prefix="relay_", suffix=Path(uf.name).suffix,
+                                dir=SPOOL_DIR or None)
+    spooled.append(Path(name))
+    with os.fdopen(fd, "wb") as f:
+        f.write(data)
+    return Path(name)
+
+
+# ==============================================================================
+# 施策抽出エンジン — ファイルから WHEN/WHAT/RESULT/INSIGHT を構造化
+# ==============================================================================
+
+class _Item:
+    """
+    抽出した1行分のレコード（Step 2 で作成し、施策の組み立てまで使う）。
+    source / category は同じ文字列が大量に繰り返されるため intern して共有する。
+    """
+    __slots__ = ("original", "source", "short", "category", "date_hint", "terms",
+                 "src_key", "src_file", "when_score", "has_num")
+
+    def __init__(self, original: str, source: str, short: str, category: str,
+                 date_hint: str, terms: frozenset[str], src_key: str, src_file: str,
+                 when_score: int, has_num: bool):
+        self.original   = original
+        self.source     = sys.intern(source)
+        self.short      = short
+        self.category   = sys.intern(category)
+        self.date_hint  = date_hint
+        self.terms      = terms
+        self.src_key    = src_key      # _same_source 用のファイル名部分
+        self.src_file   = src_file     # _collect_sources 用のファイル名部分
+        self.when_score = when_score   # date_hint の具体度（_when_score）
+        self.has_num    = has_num
+
+
+def _timed_iter(rows, timings: dict, key: str):
+    """rows から1件取り出すたびにかかった時間を timings[key] に加算する"""
+    rows = iter(rows)
+    while True:
+        t0 = perf_counter()
+        row = next(rows, None)
+        timings[key] = timings.get(key, 0.0) + (perf_counter() - t0)
+        if row is None:
+            return
+        yield row
+
+
+PROGRESS_EVERY = 500   # 分類・グループ化の進捗を通知する間隔（件数）
+
+
+def _counted_iter(rows, progress, stage: str):
+    """rows を PROGRESS_EVERY 件ごとに progress(stage, 件数, None) で通知しながら流す"""
+    n = 0
+    for n, row in enumerate(rows, 1):
+        if n % PROGRESS_EVERY == 0:
+            progress(stage, n, None)
+        yield row
+    progress(stage, n, None)
+
+
+# ==============================================================================
+# 施策抽出の計測 — 段階ごとの時間・リーダー別の時間と容量・件数を sink へ出す
+#   sink は計測レコード（dict）を1件受け取る呼び出し可能オブジェクト。
+#   sink がなければ計測用の経路は通らない（既定は RELAY_EXTRACT_TRACE で決める）
+# ==============================================================================
+
+EXTRACT_TRACE = os.environ.get("RELAY_EXTRACT_TRACE", "")   # 空=無効 / log / jsonl:<パス>
+
+_extract_log = logging.getLogger("relay.extract")
+
+
+def log_sink(record: dict) -> None:
+    """計測レコードを logger "relay.extract" へ INFO で1行の JSON として出す"""
+    _extract_log.info("%s", json.dumps(record, ensure_ascii=False))
+
+
+class JsonlSink:
+    """計測レコードを JSON Lines ファイルへ追記する（スレッド間で共有してよい）"""
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+
+    def __call__(self, record: dict) -> None:
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        with self._lock, self.path.open("a", encoding="utf-8") as f:
+            f.write(line)
+
+
+@lru_cache(maxsize=None)
+def default_extract_sink():
+    """RELAY_EXTRACT_TRACE から決まる既定の sink（無効なら None）"""
+    if EXTRACT_TRACE == "log":
+        return log_sink
+    if EXTRACT_TRACE.startswith("jsonl:"):
+        return JsonlSink(EXTRACT_TRACE[len("jsonl:"):])
+    return None
+
+
+def _trace_record(stages: dict, files: list[dict], trace: dict) -> dict:
+    """_extract_from_jobs が集めた値を sink に渡すレコードにまとめる"""
+    readers: dict[str, dict] = {}
+    for f in files:
+        r = readers.setdefault(f["reader"], {
+            "files": 0, "cached": 0, "failed": 0, "bytes": 0,
+            "seconds": 0.0, "noise_seconds": 0.0, "raw_lines": 0, "lines": 0,
+        })
+        r["files"] += 1
+        r["cached"] += f["cached"]
+        r["failed"] += f["failed"]
+        for k in ("bytes", "seconds", "noise_seconds", "raw_lines", "lines"):
+            r[k] += f[k]
+    for d in (*files, *readers.values()):
+        d["seconds"], d["noise_seconds"] = round(d["seconds"], 6), round(d["noise_seconds"], 6)
+    return {
+        "at":      datetime.now().isoformat(timespec="seconds"),
+        "stages":  {k: round(v, 6) for k, v in stages.items()},
+        "readers": readers,
+        "files":   files,
+        **trace,
+    }
+
+
+def extract_initiatives(uploaded_files, workers: int | None = None,
+                        timings: dict | None = None, progress=None, sink=None,
+                        cache_stats: dict | None = None) -> list[dict]:
+    """
+    アップロードされたファイルから施策を抽出し、
+    以下の構造で返す:
+      {
+        title   : 施策名（動詞句形式の1行）
+        when    : いつ（実施時期・最も具体的な日付を優先）
+        what    : どんなことをやったか（箇条書き）
+        result  : 結果はどうだったか（数値優先・箇条書き）
+        insight : 社内で共有すべきトピックス（実用的な知見）
+        sources : 情報ソース（ファイル名リスト・最大3件）
+      }
+
+    抽出アルゴリズム:
+      1. 全ファイルを行単位で読み込み、WHAT/RESULT/INSIGHT に分類
+      2. 同一ソース内の近接行を優先してグループ化（1施策=1グループ）
+      3. グループごとに関連 RESULT・INSIGHT を類似度で紐付け
+      4. WHEN は全プール内から最も具体的な日付表現を抽出
+      5. タイトルは「動詞＋目的語」形式で自動生成
+      6. INSIGHT は実際のテキストから知見を構成
+
+    workers: ファイル読み込みの並列プロセス数（None なら READ_WORKERS）。
+             結果はファイルの入力順に並ぶため、直列読み込みと同じ出力になる。
+    timings: 渡された場合、段階ごとの所要秒数を記録する（ベンチマーク用）。
+             read / classify / group / link
+    progress: 渡された場合、progress(段階, 件数, 総数 or None) で進捗を通知する（別スレッドの
+             ジョブから UI へ渡す用）。read=読み終えたファイル数 / classify=分類した行数 /
+             group=作ったグループ数 / link=組み立てた施策数 / done
+    sink:    計測レコードの出力先（None なら default_extract_sink()）。出力先があれば
+             終了時に1回 sink(record) を呼ぶ。record の主な内容:
+               stages  段階ごとの秒数 read（ノイズ除去を含む）/ noise / classify / group / link / total
+               readers 拡張子ごとのファイル数・バイト数・読み込み秒数・行数（files はファイル単位）
+               items   カテゴリ別の行数 / sim_comparisons グループ化での _sim の呼び出し回数
+               link_candidates 紐付けで類似度を数えた候補数 / groups / initiatives
+             並列読み込みでは readers の秒数はワーカー内の処理時間、stages.read は待ち時間を含む経過時間。
+    cache_stats: 渡された場合、この呼び出しでのパースキャッシュの hits / disk_hits / misses
+             （ファイル単位）を書き込む。他のセッション・ジョブの読み込みは含まない。
+    """
+    READERS = {
+        ".pptx": _rd_pptx if PPTX_OK else None,
+        ".xlsx": _rd_xlsx if XLSX_OK else None,
+        ".pdf":  _rd_pdf  if PDF_OK  else None,
+        ".txt":  _rd_txt,
+    }
+
+    # ══════════════════════════════════════════════════════════════
+    # Step 1: 全ファイル読み込み → ノイズ除去（行単位のジェネレータ）
+    #   大きなファイルは _spool で一時ファイルにし、抽出が終わったら削除する
+    # ══════════════════════════════════════════════════════════════
+    t0 = perf_counter()
+    if sink is None:
+        sink = default_extract_sink()
+    trace = None
+    if sink is not None:
+        trace = {"files": [], "items": {}, "sim_comparisons": 0, "link_candidates": 0,
+                 "groups": 0, "initiatives": 0}
+        if timings is None:
+            timings = {}
+    spooled: list[Path] = []
+    try:
+        jobs = []
+        for uf in uploaded_files:
+            ext = Path(uf.name).suffix.lower()
+            reader = READERS.get(ext)
+            if reader is None:
+                continue
+            jobs.append((reader, _spool(uf, spooled), uf.name))
+        if cache_stats is not None:
+            cache_stats.update(hits=0, disk_hits=0, misses=0)
+        initiatives = _extract_from_jobs(jobs, workers, timings, t0, progress, trace, cache_stats)
+        if trace is not None:
+            stages = dict(timings, total=perf_counter() - t0)
+            files = trace.pop("files")
+            stages["noise"] = sum(f["noise_seconds"] for f in files)
+            sink(_trace_record(stages, files, trace))
+        if progress is not None:
+            progress("done", len(initiatives), len(initiatives))
+        return initiatives
+    finally:
+        for p in spooled:
+            p.unlink(missing_ok=True)
+
+
+def _extract_from_jobs(jobs: list[tuple], workers: int | None,
+                       timings: dict | None, t0: float, progress=None,
+                       trace: dict | None = None, cache_stats: dict | None = None) -> list[dict]:
+    """
+    extract_initiatives の Step 2 以降（jobs は (reader, data, name) のリスト）。
+    trace が渡された場合は files / items / sim_comparisons などの計測値を書き込む。
+    """
+    # ══════════════════════════════════════════════════════════════
+    # Step 2: 短文化・分類 → カテゴリ別に振り分け（Step 1 の行を受け取りながら処理）
+    # ══════════════════════════════════════════════════════════════
+    what_items:    list[_Item] = []
+    result_items:  list[_Item] = []
+    insight_items: list[_Item] = []
+    buckets = {"WHAT": what_items, "RESULT": result_items, "INSIGHT": insight_items}
+    src_parts: dict[str, tuple[str, str]] = {}   # ソース表記 → (src_key, src_file)
+
+    def on_file(n: int) -> None:
+        progress("read", n, len(jobs))
+
+    if progress is not None:
+        on_file(0)
+    rows = _iter_rows(jobs, READ_WORKERS if workers is None else workers,
+                      on_file if progress is not None else None,
+                      trace["files"] if trace is not None else None, cache_stats)
+    if progress is not None:
+        rows = _counted_iter(rows, progress, "classify")
+    if timings is not None:
+        timings["read"] = read_pre = perf_counter() - t0
+        rows = _timed_iter(rows, timings, "read")
+        t0 = perf_counter()
+    for orig, src in rows:
+        cat = _classify(orig)
+        m = _DATE_PAT.search(orig)
+        dh = m.group(0) if m else ""
+        parts = src_parts.get(src)
+        if parts is None:
+            parts = src_parts[src] = (
+                _SRC_KEY_SPLIT.split(src)[0],
+                _SRC_FILE_SPLIT.split(src.strip())[0].strip(),
+            )
+        buckets[cat].append(_Item(
+            orig, src, _shorten(orig), cat, dh,
+            frozenset(_KANJI_TERM.findall(orig)),
+            parts[0], parts[1], _when_score(dh), _has_num(orig),
+        ))
+    if timings is not None:
+        timings["classify"] = perf_counter() - t0 - (timings["read"] - read_pre)
+    if trace is not None:
+        trace["items"] = {cat: len(items) for cat, items in buckets.items()}
+
+    if not (what_items or result_items or insight_items):
+        return []
+
+    if not what_items and not result_items:
+        return [{
+            "title":   "施策情報が見つかりませんでした",
+            "when":    "不明",
+            "what":    "・ファイルから実施内容を抽出できませんでした\n・テキストが少ないか、画像のみのPDFの可能性があります",
+            "result":  "",
+            "insight": "・PDFの場合はテキスト選択可能か確認してください\n・ExcelやPowerPointの方が抽出精度が高いです",
+            "sources": [],
+        }]
+
+    # ══════════════════════════════════════════════════════════════
+    # Step 3: ヘルパー関数群
+    # ══════════════════════════════════════════════════════════════
+
+    def _sim(a: _Item, b: _Item) -> int:
+        """漢字2文字以上の共通語数でテキスト類似度を計算（語集合は Step 1 で算出済み）"""
+        return len(a.terms & b.terms)
+
+    def _term_index(items: list[_Item]) -> dict[str, list[int]]:
+        """漢字語 → アイテム番号（昇順）の転置インデックス"""
+        index: dict[str, list[int]] = {}
+        for j, it in enumerate(items):
+            for term in it.terms:
+                index.setdefault(term, []).append(j)
+        return index
+
+    def _top_k(anchor: _Item, items: list[_Item], index: dict[str, list[int]],
+               k: int) -> list[_Item]:
+        """
+        sorted(items, key=lambda x: _sim(anchor, x), reverse=True)[:k] と同じ結果を返す。
+        類似度は共通語のポスティングリストだけから数え、上位k件を有界ヒープで選ぶ。
+        同点は元の並び順（安定ソートと同じ）。
+        """
+        counts: dict[int, int] = {}
+        for term in anchor.terms:
+            for j in index.get(term, ()):
+                counts[j] = counts.get(j, 0) + 1
+        if trace is not None:
+            trace["link_candidates"] += len(counts)
+        top = heapq.nsmallest(k, counts.items(), key=lambda c: (-c[1], c[0]))
+        picked = [items[j] for j, _ in top]
+        if len(picked) < k:
+            # 足りない分は類似度0のアイテムを元の順序で補充
+            for j, it in enumerate(items):
+                if j not in counts:
+                    picked.append(it)
+                    if len(picked) >= k:
+                        break
+        return picked
+
+    def _same_source(a: _Item, b: _Item) -> bool:
+        """同じファイルから抽出されたか判定（ページ/シート番号は無視）"""
+        return bool(a.src_key) and a.src_key == b.src_key
+
+    def _extract_when(pool: list[_Item]) -> str:
+        """
+        pool の中から最も具体的な実施時期を返す。
+        優先順: 年月日(4) > 年月(3) > 月/週番号(2) > 相対表現(1)
+        """
+        candidates = [(it.when_score, it.date_hint) for it in pool if it.date_hint]
+        return max(candidates, key=lambda x: x[0])[1] if candidates else "不明"
+
+    def _collect_sources(pool: list[_Item]) -> list[str]:
+        """
+        ソースのファイル名部分だけを抽出して重複除去し最大3件返す。
+        「report.pptx スライド3」→「report.pptx」のようにファイル名だけにする。
+        """
+        seen, out = set(), []
+        for it in pool:
+            # ページ・スライド番号を除いたファイル名部分（Step 2 で算出済み）
+            file_name = it.src_file
+            if file_name and file_name not in seen:
+                seen.add(file_name)
+                out.append(file_name)
+            if len(out) >= 3:
+                break
+        return out
+
+    def _make_title(what_list: list[_Item]) -> str:
+        """
+        施策タイトルを「動詞句＋目的語」形式で生成する。
+        例: 「顧客対応フローの見直しを実施」「在庫管理システムの導入を推進」
+        """
+        if not what_list:
+            return "施策"
+        # 動詞キーワードを含む行を優先
+        verb_kws = ["実施","導入","構築","整備","展開","改善","見直し","強化","推進","開始","完了"]
+        for it in what_list:
+            t = it.short
+            for kw in verb_kws:
+                if kw in t:
+                    # タイトルとして適切な長さに切る
+                    if len(t) <= 40:
+                        return t
+                    # 自然な区切りで切断
+                    for sep in ["を","の","に","で","が","、"]:
+                        idx = t[:36].rfind(sep)
+                        if idx > 10:
+                            return t[:idx + 1]
+                    return t[:38] + "…"
+        # 動詞キーワードがない場合は最初のアイテムの短文
+        t = what_list[0].short
+        return t[:42] if len(t) <= 42 else t[:38] + "…"
+
+    def _build_insight(what_list: list[_Item], result_list: list[_Item],
+                       existing_insight: list[_Item]) -> str:
+        """
+        実用的な社内共有トピックを生成する。
+
+        優先順:
+          1. ファイルに実際のINSIGHTテキストがあればそれを使う
+          2. なければ実施内容×結果の組み合わせから知見を生成
+             - 成功なら横展開ポイントを記述
+             - 失敗なら再発防止の観点を記述
+             - 継続中なら進捗と次のアクションを記述
+        """
+        # ① ファイル由来のINSIGHTを優先
+        if existing_insight:
+            lines = [it.short for it in existing_insight[:4] if it.short.strip()]
+            if lines:
+                # 箇条書き記号がなければ付与
+                return "\n".join(
+                    ("・" + l) if not l.startswith("・") else l
+                    for l in lines
+                )
+
+        # ② 結果×実施内容から知見を自動生成
+        parts = []
+
+        # 成功・失敗・継続中を判定
+        all_text = " ".join(
+            it.original for it in result_list + what_list
+        )
+        is_success = any(kw in all_text for kw in
+                         ["達成","完了","成功","向上","改善","解決","削減","実現","ゼロ件","0件"])
+        is_failure = any(kw in all_text for kw in
+                         ["未達","失敗","遅延","中断","停止","悪化","未解決"])
+        is_ongoing = any(kw in all_text for kw in
+                         ["対応中","調査中","継続","進行中","実施中","検討中"])
+        has_num    = any(it.has_num for it in result_list)
+
+        if what_list:
+            act_short = what_list[0].short[:28]
+            act_orig  = what_list[0].original
+
+            if is_success:
+                parts.append(f"・【再現性あり】「{act_short}」は同種の課題に横展開可能")
+                if len(what_list) > 1:
+                    parts.append(f"・実施ステップ: {' → '.join(it.short[:18] for it in what_list[:3])}")
+            elif is_failure:
+                parts.append(f"・【要注意】「{act_short}」は期待した効果が得られなかった")
+                parts.append("・原因分析と再発防止策の策定が必要。関連部署への共有を推奨")
+            elif is_ongoing:
+                parts.append(f"・【継続対応中】「{act_short}」は現在進行中")
+                parts.append("・次月報告で結果を記録予定。進捗を数値で追うこと")
+            else:
+                parts.append(f"・「{act_short}」を実施。効果測定を継続")
+
+        if has_num:
+            # 数値を含む結果テキストからベンチマーク提案
+            num_results = [it.short for it in result_list if it.has_num]
+            if num_results:
+                parts.append(f"・定量成果（{num_results[0][:24]}）はベンチマーク値として活用できる")
+        else:
+            parts.append("・次回から成果を数値で記録すると評価・比較が容易になる")
+
+        return "\n".join(parts) if parts else "・次回報告時に共有トピックを記録してください"
+
+    # ══════════════════════════════════════════════════════════════
+    # Step 4: WHATアイテムをグループ化して施策を組み立てる
+    # ══════════════════════════════════════════════════════════════
+    initiatives: list[dict] = []
+    t0 = perf_counter()
+
+    if what_items:
+        postings = _term_index(what_items)
+        used   = [False] * len(what_items)
+        groups: list[list[_Item]] = []
+        n_sim  = 0
+
+        for i, w in enumerate(what_items):
+            if used[i]:
+                continue
+            group = [w]
+            used[i] = True
+
+            # 統合には共通語が1つ以上必要なので、候補は w と語を共有する後続アイテムのみ。
+            # 各ポスティングリストの i より後ろを番号順にマージして走査する
+            streams = [
+                islice(pl, bisect_right(pl, i), None)
+                for pl in (postings[t] for t in w.terms)
+            ]
+            prev = -1
+            for j in heapq.merge(*streams):
+                if j == prev or used[j]:
+                    continue
+                prev = j
+                w2 = what_items[j]
+                # 同じファイルの近接行 OR 類似度が高い → 同一施策
+                sim_score = _sim(w, w2)
+                n_sim += 1
+                if sim_score >= 1 and _same_source(w, w2):   # 同ファイルなら低い閾値
+                    group.append(w2)
+                    used[j] = True
+                elif sim_score >= 3:                           # 別ファイルでも高類似なら統合
+                    group.append(w2)
+                    used[j] = True
+                if len(group) >= 5:
+                    break
+            groups.append(group)
+            if progress is not None and len(groups) % PROGRESS_EVERY == 0:
+                progress("group", len(groups), None)
+
+        if progress is not None:
+            progress("group", len(groups), len(groups))
+        if trace is not None:
+            trace["sim_comparisons"], trace["groups"] = n_sim, len(groups)
+        if timings is not None:
+            timings["group"] = perf_counter() - t0
+            t0 = perf_counter()
+
+        res_index = _term_index(result_items)
+        ins_index = _term_index(insight_items)
+        for k, group in enumerate(groups[:8]):   # 最大8施策
+            if progress is not None:
+                progress("link", k, min(len(groups), 8))
+            anchor   = group[0]
+            rel_res  = _top_k(anchor, result_items,  res_index, 4)
+            rel_ins  = _top_k(anchor, insight_items, ins_index, 3)
+            pool_all = group + rel_res + rel_ins
+
+            # ── 4フィールドを組み立て ──
+            title  = _make_title(group)
+            when   = _extract_when(pool_all)
+
+            # WHAT: 重複除去して箇条書き（最大5行）
+            what_lines = list(dict.fromkeys(
+                it.short for it in group if it.short.strip()
+            ))
+            what_text = "\n".join(
+                ("・" + l) if not l.startswith("・") else l
+                for l in what_lines[:5]
+            )
+
+            # RESULT: 数値を含む行を優先して最大4行
+            res_with_num    = [it for it in rel_res if it.has_num]
+            res_without_num = [it for it in rel_res if not it.has_num]
+            res_ordered = res_with_num + res_without_num  # 数値あり優先
+            res_lines   = list(dict.fromkeys(
+                it.short for it in res_ordered if it.short.strip()
+            ))
+            res_text = "\n".join(
+                ("・" + l) if not l.startswith("・") else l
+                for l in res_lines[:4]
+            ) if res_lines else ""
+
+            insight_text = _build_insight(group, rel_res, rel_ins)
+            sources      = _collect_sources(pool_all)
+
+            initiatives.append({
+                "title":   title,
+                "when":    when,
+                "what":    what_text,
+                "result":  res_text,
+                "insight": insight_text,
+                "sources": sources,
+            })
+
+    # WHATなし・RESULTのみの場合
+    elif result_items:
+        ins_index = _term_index(insight_items)
+        for res in result_items[:4]:
+            rel_ins      = _top_k(res, insight_items, ins_index, 2)
+            pool_all     = [res] + rel_ins
+            insight_text = _build_insight([], [res], rel_ins)
+            initiatives.append({
+                "title":   res.short[:54],
+                "when":    _extract_when(pool_all),
+                "what":    "",
+                "result":  ("・" if not res.short.startswith("・") else "") + res.short,
+                "insight": insight_text,
+                "sources": _collect_sources(pool_all),
+            })
+
+    if timings is not None:
+        timings.setdefault("group", 0.0)
+        timings["link"] = perf_counter() - t0
+    if trace is not None:
+        trace["initiatives"] = len(initiatives)
+
+    if not initiatives:
+        return [{
+            "title":   "施策情報が見つかりませんでした",
+            "when":    "不明",
+            "what":    "・ファイルから実施内容を抽出できませんでした\n・ファイルの形式や内容を確認してください",
+            "result":  "",
+            "insight": "・テキストが少ない場合や画像のみのPDFは対応していません",
+            "sources": [],
+        }]
+
+    return initiatives
+
+
+# ==============================================================================
+# PPTX 生成エンジン — ビジネスレポートスタイル
+# ==============================================================================
+
+_pptx_loaded = False
+_pptx_load_lock = threading.Lock()
+
+
+def _load_pptx() -> None:
+    """
+    python-pptx を読み込み、PPTX エンジンが使う名前をこのモジュールに束ねる（初回のみ）。
+    生成ジョブが並行して呼ぶため、すべての名前を束ねてから _pptx_loaded を立てる。
+    """
+    global Presentation, Inches, Pt, RGBColor, PP_ALIGN, MSO_SHAPE, qn, _pptx_loaded
+    if _pptx_loaded:
+        return
+    with _pptx_load_lock:
+        if _pptx_loaded:
+            return
+        from pptx import Presentation
+        from pptx.oxml.ns import qn
+        from pptx.util import Inches, Pt
+        from pptx.dml.color import RGBColor
+        from pptx.enum.text import PP_ALIGN
+        from pptx.enum.shapes import MSO_SHAPE
+        _pptx_loaded = True
+
+
+# ── PPTX カラーパレット（R, G, B）──────────────────────────────────
+C_WHITE  = (0xFF, 0xFF, 0xFF)
+C_NAVY   = (0x1E, 0x40, 0x80)   # ヘッダー背景
+C_BLUE   = (0x25, 0x63, 0xEB)   # アクセント・WHTATラベル
+C_GRAY   = (0xF7, 0xF8, 0xFA)   # スライド背景
+C_DARK   = (0x1A, 0x1A, 0x1A)   # 本文テキスト
+C_MID    = (0x6B, 0x72, 0x80)   # 補助テキスト
+C_BORDER = (0xE5, 0xE7, 0xEB)   # ボーダー・フッター背景
+
+
+# ── スタイル表 ─────────────────────────────────────────────────────
+# 同じ色・サイズ・行間が1デッキで何百回も使われるため、変換結果を値ごとに1つだけ作って使い回す。
+# RGBColor / Length は不変、a:lnSpc は使う側で複製する。
+@lru_cache(maxsize=None)
+def _pptx_rgb(r, g, b):
+    return RGBColor(r, g, b)
+
+
+@lru_cache(maxsize=None)
+def _inches(v):
+    return Inches(v)
+
+
+@lru_cache(maxsize=None)
+def _pt(size):
+    return Pt(size)
+
+
+@lru_cache(maxsize=None)
+def _ln_spacing(spacing: float):
+    """行間 spacing の a:lnSpc 要素（雛形）"""
+    from lxml import etree
+    from pptx.oxml.xmlchemy import OxmlElement
+    lnSpc = OxmlElement("a:lnSpc")
+    etree.SubElement(lnSpc, qn("a:spcPct")).set("val", str(int(spacing * 100000)))
+    return lnSpc
+
+
+@lru_cache(maxsize=None)
+def _para_style(align, spacing: float):
+    """揃え・行間を設定済みの a:pPr 要素（雛形）"""
+    from pptx.oxml.xmlchemy import OxmlElement
+    from pptx.text.text import _Paragraph
+    p = OxmlElement("a:p")
+    _Paragraph(p, None).alignment = align
+    pPr = p.get_or_add_pPr()
+    pPr.append(deepcopy(_ln_spacing(spacing)))
+    return pPr
+
+
+@lru_cache(maxsize=None)
+def _run_style(size, bold: bool, italic: bool, color):
+    """サイズ・太字・斜体・色を設定済みの a:rPr 要素（雛形）"""
+    from pptx.oxml.xmlchemy import OxmlElement
+    from pptx.text.text import Font
+    rPr = OxmlElement("a:rPr")
+    font = Font(rPr)
+    font.size = _pt(size)
+    font.bold = bold
+    font.italic = italic
+    if color:
+        font.color.rgb = _pptx_rgb(*color)
+    return rPr
+
+
+def _pptx_rect(sl, l, t, w, h, fill_rgb, line_rgb=None, line_w=0.5):
+    shape = sl.shapes.add_shape(
+        MSO_SHAPE.RECTANGLE, _inches(l), _inches(t), _inches(w), _inches(h)
+    )
+    shape.fill.solid()
+    shape.fill.fore_color.rgb = _pptx_rgb(*fill_rgb)
+    if line_rgb:
+        shape.line.color.rgb = _pptx_rgb(*line_rgb)
+        shape.line.width = _pt(line_w)
+    else:
+        shape.line.fill.background()
+    return shape
+
+
+def _pptx_text(sl, text, l, t, w, h, size, bold=False, color=None,
+               italic=False, align=None, spacing=1.15, name=None):
+    if align is None:
+        align = PP_ALIGN.LEFT
+
+    tb = sl.shapes.add_textbox(_inches(l), _inches(t), _inches(w), _inches(h))
+    if name:
+        tb.name = name
+    tf = tb.text_frame
+    tf.word_wrap = True
+
+    pPr = _para_style(align, spacing)
+    rPr = _run_style(size, bold, italic, tuple(color) if color else None)
+
+    def _para(p, txt):
+        p._p.insert(0, deepcopy(pPr))
+        r = p.add_run()
+        r._r.insert(0, deepcopy(rPr))
+        r.text = txt
+
+    segs = str(text).split('\n')
+    _para(tf.paragraphs[0], segs[0])
+    for seg in segs[1:]:
+        _para(tf.add_paragraph(), seg)
+    return tb
+
+
+# 施策スライドのうち、施策ごとに中身が変わるテキストボックス（スケルトン内では shape 名で識別）
+_SLOT = "relay:"
+_SLOTS = ("num", "when", "title", "what", "result", "insight", "sources", "date")
+
+
+def _initiative_texts(iv: dict, idx: int, total: int, today: str) -> dict[str, str]:
+    """施策スライドの各テキストボックスに入れる文字列（sources は空なら枠ごと省く）"""
+    # タイトル: 長い場合は自然な区切りで改行
+    title = (iv.get("title") or "施策").strip()[:64]
+    if len(title) > 32:
+        for sep in ["を", "の", "に", "で", "が", "、"]:
+            idx_s = title[:32].rfind(sep)
+            if idx_s > 8:
+                title = title[:idx_s + 1] + "\n" + title[idx_s + 1:]
+                break
+
+    def _body(body_txt):
+        # 箇条書き記号の統一（「・」に統一）
+        body = (body_txt or "").strip() or "（記録なし）"
+        body_lines = []
+        for line in body.split("\n"):
+            line = line.strip()
+            if not line:
+                continue
+            if not line.startswith("・"):
+                line = "・" + line
+            body_lines.append(line)
+        return "\n".join(body_lines) if body_lines else "（記録なし）"
+
+    sources = iv.get("sources", [])
+    return {
+        "num":     f"INITIATIVE  {idx}  /  {total}",
+        "when":    f"🗓  {(iv.get('when') or '不明').strip()}",
+        "title":   title,
+        "what":    _body(iv.get("what", "")),
+        "result":  _body(iv.get("result", "")),
+        "insight": _body(iv.get("insight", "")),
+        "sources": "📎 情報ソース：" + "　/　".join(sources[:3]) if sources else "",
+        "date":    f"生成：{today}",
+    }
+
+
+@lru_cache(maxsize=1)
+def _initiative_skeleton():
+    """
+    施策スライドの雛形（p:cSld 要素）。
+    別の Presentation 上に一度だけ描画し、以降のスライドはこの XML を複製して使う。
+    """
+    _load_pptx()
+    prs = Presentation()
+    prs.slide_width  = Inches(10)
+    prs.slide_height = Inches(7.5)
+    sl = prs.slides.add_slide(prs.slide_layouts[6])
+    _draw_initiative_slide(sl, dict.fromkeys(_SLOTS, " "))
+    return sl._element.cSld
+
+
+def _fill_text(sp, text: str) -> None:
+    """雛形のテキストボックスの段落を text の行数分複製し、ランの文字列だけ差し替える"""
+    txBody = sp.txBody
+    paras  = txBody.findall(qn("a:p"))
+    tmpl   = paras[0]
+    for p in paras:
+        txBody.remove(p)
+    for seg in str(text).split("\n"):
+        p = deepcopy(tmpl)
+        p.findall(qn("a:r"))[0].text = seg
+        txBody.append(p)
+
+
+SLIDE_CACHE_MAX = 4096   # 描画済みスライドを保持する枚数
+SLIDE_WORKERS   = int(os.environ.get("RELAY_SLIDE_WORKERS", "0"))   # 1以下ならこのプロセスで描画
+
+
+class _SlideCache:
+    """
+    描画済みの施策スライド（p:cSld の XML）を、施策の内容と番号から作ったキーで保持する。
+    カードを1枚だけ編集して再生成した場合、他のスライドは XML を読み戻すだけで済む。
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._mem: OrderedDict[str, bytes] = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0}
+
+    @staticmethod
+    def key(iv: dict, idx: int, total: int, today: str) -> str:
+        fields = [iv.get(k) for k in ("title", "when", "what", "result", "insight", "sources")]
+        raw = json.dumps([fields, idx, total, today], ensure_ascii=False)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def peek(self, key: str) -> bool:
+        """統計を更新せずに有無だけ確認する"""
+        with self._lock:
+            return key in self._mem
+
+    def get(self, key: str) -> bytes | None:
+        with self._lock:
+            xml = self._mem.get(key)
+            if xml is None:
+                self.stats["misses"] += 1
+                return None
+            self._mem.move_to_end(key)
+            self.stats["hits"] += 1
+            return xml
+
+    def put(self, key: str, xml: bytes) -> None:
+        with self._lock:
+            self._mem[key] = xml
+            self._mem.move_to_end(key)
+            while len(self._mem) > self.max_entries:
+                self._mem.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._mem.clear()
+            self.stats = {"hits": 0, "misses": 0}
+
+
+@lru_cache(maxsize=None)
+def _slide_cache() -> _SlideCache:
+    """プロセス内で共有するスライドキャッシュ"""
+    return _SlideCache(SLIDE_CACHE_MAX)
+
+
+def _render_initiative(iv: dict, idx: int, total: int, today: str):
+    """_initiative_skeleton を複製してテキストを流し込んだ p:cSld 要素を返す"""
+    cSld  = deepcopy(_initiative_skeleton())
+    texts = _initiative_texts(iv, idx, total, today)
+    spTree = cSld.spTree
+    for sp in spTree.findall(qn("p:sp")):
+        name = sp.nvSpPr.cNvPr.get("name", "")
+        if not name.startswith(_SLOT):
+            continue
+        txt = texts[name[len(_SLOT):]]
+        if txt:
+            _fill_text(sp, txt)
+        else:
+            spTree.remove(sp)
+    return cSld
+
+
+def _render_slides_xml(jobs: list[tuple]) -> list[tuple[str, bytes]]:
+    """(key, iv, idx, total, today) のリストを描画し (key, XML) で返す（ワーカープロセス用）"""
+    from lxml import etree
+    return [(key, etree.tostring(_render_initiative(*args))) for key, *args in jobs]
+
+
+def _build_initiative_slide(prs, iv: dict, idx: int, total: int, today: str):
+    """
+    施策スライドを1枚追加する。
+    キャッシュにあれば描画済みの XML を差し込み、なければ _render_initiative で描画して
+    その結果をキャッシュする。
+    """
+    from lxml import etree
+    from pptx.oxml import parse_xml
+
+    sl = prs.slides.add_slide(prs.slide_layouts[6])
+    cache = _slide_cache()
+    key = cache.key(iv, idx, total, today)
+    xml = cache.get(key)
+    if xml is not None:
+        cSld = parse_xml(xml)
+    else:
+        cSld = _render_initiative(iv, idx, total, today)
+        cache.put(key, etree.tostring(cSld))
+    old = sl._element.cSld
+    old.getparent().replace(old, cSld)
+    return sl
+
+
+@lru_cache(maxsize=None)
+def _slide_pool(workers: int) -> ProcessPoolExecutor:
+    """スライド描画用のプロセスプール（ワーカー数ごとに1つ・プロセス内で共有）"""
+    return _process_pool(workers)
+
+
+def _prerender_slides(initiatives: list[dict], today: str, workers: int) -> None:
+    """
+    キャッシュにない施策スライドをワーカープロセスで描画し、スライドキャッシュに入れる。
+    組み立て（add_slide・保存）は呼び出し側のプロセスで番号順に行う。
+    """
+    cache = _slide_cache()
+    n = len(initiatives)
+    jobs = []
+    for i, iv in enumerate(initiatives, 1):
+        key = cache.key(iv, i, n, today)
+        if not cache.peek(key):
+            jobs.append((key, iv, i, n, today))
+    if len(jobs) < 2:
+        return
+    size = max(1, -(-len(jobs) // (workers * 4)))     # 1ワーカーあたり4チャンク程度
+    chunks = [jobs[k:k + size] for k in range(0, len(jobs), size)]
+    try:
+        for rendered in _slide_pool(workers).map(_render_slides_xml, chunks):
+            for key, xml in rendered:
+                cache.put(key, xml)
+    except Exception:
+        # プールが使えない場合は、組み立て時にこのプロセスで描画する
+        return
+
+
+def _draw_initiative_slide(sl, texts: dict[str, str]):
+    """
+    1施策 = 1スライド — 意思決定者が5分以内で読めるレイアウト
+
+    構成:
+      [Header ] 施策タイトル（大・白）+ 実施時期（右）+ スライド番号
+      [Block 1] 🔧 実施内容（WHAT）  — 青系・最大5行
+      [Block 2] 📊 結果              — 緑系・最大4行（数値優先）
+      [Block 3] 💡 共有トピック      — 紫系・最大3行
+      [Footer ] 📎 情報ソース + 生成日
+
+    texts: _initiative_texts の戻り値。各テキストボックスには _SLOT + キー名を付ける。
+    """
+    W, H = 10.0, 7.5
+
+    # ── 背景 ──────────────────────────────────────────────────────
+    bg = sl.background.fill
+    bg.solid()
+    bg.fore_color.rgb = _pptx_rgb(0xF8, 0xFA, 0xFF)   # やや青みのある白
+
+    # ── ヘッダーバー ───────────────────────────────────────────────
+    HDR_H = 1.14
+    _pptx_rect(sl, 0, 0, W, HDR_H, C_NAVY)
+    # アクセントライン（青）
+    _pptx_rect(sl, 0, HDR_H - 0.038, W, 0.038, C_BLUE)
+
+    # スライド番号（左上・小・薄色）
+    _pptx_text(
+        sl, texts["num"],
+        0.38, 0.065, 4.0, 0.22, 7.5,
+        color=_pptx_rgb(0x93, 0xC5, 0xFD), italic=True, name=_SLOT + "num",
+    )
+
+    # 実施時期（右上・目立つ色）
+    _pptx_text(
+        sl, texts["when"],
+        0.38, 0.065, W - 0.54, 0.22, 8,
+        color=_pptx_rgb(0xFD, 0xE6, 0x8A),   # 黄色系（視認性高）
+        align=PP_ALIGN.RIGHT, name=_SLOT + "when",
+    )
+
+    # タイトル（大・白・太字）
+    _pptx_text(
+        sl, texts["title"],
+        0.38, 0.30, W - 0.54, 0.76, 18,
+        bold=True, color=C_WHITE, spacing=1.22, name=_SLOT + "title",
+    )
+
+    # ── レイアウト計算 ─────────────────────────────────────────────
+    BX       = 0.28        # ブロック左端X
+    BW       = W - 0.56    # ブロック幅
+    LABEL_H  = 0.30        # ラベルバー高さ
+    GAP      = 0.07        # ブロック間隔
+    BODY_PAD_T = 0.09      # 本文上パディング
+    BODY_PAD_B = 0.08      # 本文下パディング
+    FOOT_H   = 0.36        # フッター高さ
+
+    # 本文エリア: ヘッダー下端 〜 フッター上端
+    BODY_AREA_Y = HDR_H + 0.08
+    BODY_AREA_H = H - BODY_AREA_Y - FOOT_H - 0.06
+
+    # 3ブロックの高さ比率（WHAT多め・RESULTとINSIGHTは同等）
+    # 計算: BODY_AREA_H から2つのGAP分を引いて3分割
+    avail = BODY_AREA_H - GAP * 2
+    BH_WHAT    = round(avail * 0.38, 3)
+    BH_RESULT  = round(avail * 0.33, 3)
+    BH_INSIGHT = round(avail - BH_WHAT - BH_RESULT, 3)
+
+    Y_WHAT    = BODY_AREA_Y
+    Y_RESULT  = Y_WHAT   + BH_WHAT   + GAP
+    Y_INSIGHT = Y_RESULT + BH_RESULT + GAP
+
+    def _block(y, bh, bg_rgb, border_rgb, label_bg_rgb, label_icon, label_name, slot):
+        """
+        ブロックを描画する。
+        構造: [ラベルバー（色帯 + アイコン＋テキスト）] + [本文エリア]
+        """
+        # 外枠
+        _pptx_rect(sl, BX, y, BW, bh, bg_rgb, border_rgb, 0.5)
+
+        # ラベルバー（左端カラー帯）
+        _pptx_rect(sl, BX, y, BW, LABEL_H, label_bg_rgb)
+        _pptx_text(
+            sl, f"{label_icon}  {label_name}",
+            BX + 0.14, y + 0.05, 2.4, 0.22, 9,
+            bold=True, color=C_WHITE,
+        )
+
+        # 本文
+        _pptx_text(
+            sl, texts[slot],
+            BX + 0.18, y + LABEL_H + BODY_PAD_T,
+            BW - 0.30, bh - LABEL_H - BODY_PAD_T - BODY_PAD_B,
+            10.5, color=C_DARK, spacing=1.62, name=_SLOT + slot,
+        )
+
+    # Block 1: 実施内容（WHAT）— 青系
+    _block(
+        Y_WHAT, BH_WHAT,
+        bg_rgb      = _pptx_rgb(0xEF, 0xF6, 0xFF),
+        border_rgb  = _pptx_rgb(0x93, 0xC5, 0xFD),
+        label_bg_rgb= C_BLUE,
+        label_icon  = "🔧",
+        label_name  = "実施内容",
+        slot        = "what",
+    )
+
+    # Block 2: 結果（RESULT）— 緑系
+    _block(
+        Y_RESULT, BH_RESULT,
+        bg_rgb      = _pptx_rgb(0xF0, 0xFD, 0xF4),
+        border_rgb  = _pptx_rgb(0x6E, 0xE7, 0xB7),
+        label_bg_rgb= _pptx_rgb(0x05, 0x96, 0x69),
+        label_icon  = "📊",
+        label_name  = "結果",
+        slot        = "result",
+    )
+
+    # Block 3: 共有トピック（INSIGHT）— 紫系
+    _block(
+        Y_INSIGHT, BH_INSIGHT,
+        bg_rgb      = _pptx_rgb(0xF5, 0xF3, 0xFF),
+        border_rgb  = _pptx_rgb(0xC4, 0xB5, 0xFD),
+        label_bg_rgb= _pptx_rgb(0x71, 0x3F, 0xD4),
+        label_icon  = "💡",
+        label_name  = "共有トピック",
+        slot        = "insight",
+    )
+
+    # ── フッター（情報ソース + 生成日）────────────────────────────
+    FOOT_Y = H - FOOT_H
+    _pptx_rect(sl, 0, FOOT_Y, W, FOOT_H, _pptx_rgb(0xF1, 0xF5, 0xF9))
+    _pptx_rect(sl, 0, FOOT_Y, W, 0.022, _pptx_rgb(0xCB, 0xD5, 0xE1))  # 上ボーダー
+
+    if texts["sources"]:
+        _pptx_text(
+            sl, texts["sources"],
+            0.32, FOOT_Y + 0.07, W * 0.70, 0.22, 7.5,
+            color=C_MID, italic=True, name=_SLOT + "sources",
+        )
+
+    _pptx_text(
+        sl, texts["date"],
+        0.32, FOOT_Y + 0.07, W - 0.44, 0.22, 7.5,
+        color=C_MID, italic=True, align=PP_ALIGN.RIGHT, name=_SLOT + "date",
+    )
+
+
+def _build_cover_slide(prs, today: str, n_initiatives: int):
+    """表紙スライド — ビジネスレポートスタイル"""
+    sl = prs.slides.add_slide(prs.slide_layouts[6])
+    W, H = 10.0, 7.5
+
+    # 背景（紺グラデーション風）
+    bg = sl.background.fill; bg.solid(); bg.fore_color.rgb = _pptx_rgb(*C_NAVY)
+    # 下部アクセント
+    _pptx_rect(sl, 0, H * 0.60, W, H * 0.40, C_BLUE)
+    _pptx_rect(sl, 0, H * 0.60 - 0.03, W, 0.05, C_WHITE)
+
+    # メインタイトル
+    _pptx_text(sl, "月次施策レポート", 0.8, 1.8, W - 1.6, 1.1, 30,
+               bold=True, color=C_WHITE, align=PP_ALIGN.CENTER)
+
+    # サブタイトル（施策数・生成日）
+    _pptx_text(sl,
+               f"施策数：{n_initiatives} 件　|　生成日：{today}",
+               0.8, 3.1, W - 1.6, 0.5, 13,
+               color=_pptx_rgb(0xBF, 0xDB, 0xFE), align=PP_ALIGN.CENTER)
+
+    # スライド構成の説明（右下）
+    _pptx_text(sl,
+               "各スライドの構成\n"
+               "■ 実施内容   ■ 結果   ■ 共有トピック",
+               0.8, 3.80, W - 1.6, 0.6, 10,
+               color=_pptx_rgb(0x93, 0xC5, 0xFD), align=PP_ALIGN.CENTER,
+               italic=True)
+
+
+def save_pptx(initiatives: list[dict], dest, timings: dict | None = None,
+              workers: int | None = None) -> None:
+    """
+    施策リストからPPTXを生成し、dest（パスまたは書き込み可能なファイルオブジェクト）へ直接書き出す。
+    デッキ全体の bytes をメモリ上に作らない。
+    timings: 渡された場合、build（スライド構築）/ save（保存）の所要秒数を記録する。
+    workers: 施策スライドを描画する並列プロセス数（None なら SLIDE_WORKERS）。
+             2以上なら描画だけをワーカーで行い、スライドの並びは直列の場合と同じ。
+    """
+    t0 = perf_counter()
+    _load_pptx()
+    prs = Presentation()
+    prs.slide_width  = Inches(10)
+    prs.slide_height = Inches(7.5)
+
+    today = datetime.now().strftime("%Y年%m月%d日")
+    n = len(initiatives)
+
+    workers = SLIDE_WORKERS if workers is None else workers
+    if workers > 1:
+        _prerender_slides(initiatives, today, workers)
+
+    _build_cover_slide(prs, today, n)
+    for i, iv in enumerate(initiatives, 1):
+        _build_initiative_slide(prs, iv, i, n, today)
+
+    t1 = perf_counter()
+    prs.save(dest)
+    if timings is not None:
+        timings["build"] = t1 - t0
+        timings["save"]  = perf_counter() - t1
+
+
+def generate_pptx(initiatives: list[dict], timings: dict | None = None,
+                  workers: int | None = None) -> bytes:
+    """施策リストからPPTXを生成してbytesで返す（timings / workers は save_pptx と同じ）"""
+    buf = io.BytesIO()
+    save_pptx(initiatives, buf, timings, workers)
+    return buf.getvalue()
@@ -0,0 +1,338 @@
+# ==============================================================================
+# Project Relay — ジョブスケジューラ
+#
+# 施策抽出（解析）とスライド生成を、セッションの外で共有のワーカーに実行させる。
+#   - ワーカー数は JOB_WORKERS で固定。待ち行列はユーザー（owner）ごとに持ち、
+#     ユーザー間で1件ずつ順番に取り出す（1人が大量に投入しても他の人を待たせない）
+#   - 同じ入力（ファイル一式 / 施策リスト）のジョブは1つにまとめ、結果を共有する
+#   - 待ち件数・待ち時間などの指標は metrics() で読む
+# UI は再実行のたびに snapshot() で状態と進捗を読むだけにする。Streamlit は使わない。
+# ==============================================================================
+
+from __future__ import annotations
+
+import io
+import os
+import json
+import uuid
+import hashlib
+import tempfile
+import threading
+from collections import OrderedDict, deque
+from copy import deepcopy
+from datetime import datetime
+from functools import lru_cache
+from pathlib import Path
+from time import monotonic
+
+from relay_core import extract_initiatives, save_pptx, default_extract_sink
+
+JOB_WORKERS     = int(os.environ.get("RELAY_JOB_WORKERS", "2"))   # 同時に動くジョブの数
+JOB_TTL_SEC     = 30 * 60   # 終了後これより古いジョブ（と共有中の結果）は次の投入時に破棄
+METRICS_WINDOW  = 200       # 待ち時間・実行時間の統計に使う直近のジョブ数
+
+QUEUED, RUNNING, DONE, FAILED, CANCELLED = "queued", "running", "done", "failed", "cancelled"
+
+
+class _Upload(io.BytesIO):
+    """ジョブに渡すアップロードの控え（name / size / read()）。bytes は元のアップロードと共有する"""
+
+    def __init__(self, name: str, data: bytes):
+        super().__init__(data)
+        self.name = name
+        self.size = len(data)
+
+
+class _Cancelled(Exception):
+    pass
+
+
+class Job:
+    """
+    スケジューラに投入した1件の処理。状態は queued → running → done / failed / cancelled。
+    同じ key のジョブを投入した owner は全員このジョブを共有し、全員が手放すと取り消される。
+    進捗は実行スレッドから更新されるため、UI からは snapshot() で読む。
+    """
+
+    def __init__(self, kind: str, key: str, fn, args: tuple, discard=None):
+        self.id   = uuid.uuid4().hex
+        self.kind = kind
+        self.key  = key
+        self.owners: set[str] = set()
+        self.submitted_at = monotonic()
+        self.started_at:  float | None = None
+        self.finished_at: float | None = None
+        self._fn, self._args, self._discard = fn, args, discard
+        self._lock = threading.Lock()
+        self._cancel = threading.Event()
+        self._result = None
+        self._state = {
+            "state": QUEUED, "stage": "", "files_done": 0, "files_total": 0,
+            "items": 0, "groups": 0, "linked": 0, "link_total": 0,
+            "error": "", "cache": {}, "shared": 1, "trace": None,
+        }
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return dict(self._state, shared=len(self.owners))
+
+    def result(self):
+        """done になったジョブの結果（共有しているため複製して返す）"""
+        if self.snapshot()["state"] != DONE:
+            raise RuntimeError(f"job {self.id} has no result ({self.snapshot()['state']})")
+        return deepcopy(self._result)
+
+    @property
+    def finished(self) -> bool:
+        return self.snapshot()["state"] in (DONE, FAILED, CANCELLED)
+
+    # ── 実行スレッドから ──
+    def _progress(self, stage: str, done: int, total: int | None) -> None:
+        """extract_initiatives の progress。取り消されていたらここで止める"""
+        if self._cancel.is_set():
+            raise _Cancelled
+        with self._lock:
+            st = self._state
+            st["stage"] = stage
+            if stage == "read":
+                st["files_done"], st["files_total"] = done, total or 0
+            elif stage == "classify":
+                st["items"] = done
+            elif stage == "group":
+                st["groups"] = done
+            elif stage == "link":
+                st["linked"], st["link_total"] = done, total or 0
+
+    def _run(self) -> None:
+        try:
+            result = self._fn(self, *self._args)
+        except _Cancelled:
+            self._finish(CANCELLED)
+            return
+        except Exception as e:
+            self._finish(FAILED, error=f"{type(e).__name__}: {e}")
+            return
+        self._result = result
+        self._finish(DONE)
+
+    def _finish(self, state: str, error: str = "") -> None:
+        with self._lock:
+            if self._state["state"] in (DONE, FAILED, CANCELLED):
+                return
+            self._state["state"] = state
+            self._state["error"] = error
+            self.finished_at = monotonic()
+            self._args = ()          # 入力（アップロード等）の参照を早めに手放す
+
+    def _drop(self) -> None:
+        """保持期限切れで破棄するときに呼ぶ（結果が一時ファイルなら削除）"""
+        if self._discard is not None and self._result is not None:
+            self._discard(self._result)
+        self._result = None
+
+
+class JobScheduler:
+    """
+    共有ワーカーでジョブを実行する（プロセス内で1つ・全セッション共有）。
+    待ち行列は owner ごとの FIFO で、ワーカーは owner を順番に巡って1件ずつ取り出す。
+    """
+
+    def __init__(self, workers: int):
+        self.workers = max(1, workers)
+        self._cv = threading.Condition()
+        self._queues: OrderedDict[str, deque[Job]] = OrderedDict()   # 巡回順
+        self._jobs:   dict[str, Job] = {}        # id → ジョブ
+        self._by_key: dict[str, Job] = {}        # key → 共有中のジョブ（失敗・取り消しは除く）
+        self._running = 0
+        self._waits: deque[float] = deque(maxlen=METRICS_WINDOW)
+        self._runs:  deque[float] = deque(maxlen=METRICS_WINDOW)
+        self._counts = {"submitted": 0, "deduplicated": 0, "done": 0, "failed": 0, "cancelled": 0}
+        for i in range(self.workers):
+            threading.Thread(target=self._worker, name=f"relay-job-{i}", daemon=True).start()
+
+    # ── 投入・参照 ──
+    def submit(self, owner: str, kind: str, key: str, fn, *args, discard=None) -> Job:
+        """
+        fn(job, *args) を実行するジョブを投入する。同じ key のジョブが待ち・実行中・完了済み
+        （保持期限内）なら新しく作らずにそれを返す。owner が同じ kind で持っている
+        未完了のジョブは手放す（1人1種類につき1件）。
+        """
+        with self._cv:
+            self._prune()
+            self._counts["submitted"] += 1
+            for job in list(self._jobs.values()):
+                if job.kind == kind and owner in job.owners and job.key != key:
+                    self._release(owner, job)
+            job = self._by_key.get(key)
+            if job is not None and not job._cancel.is_set():
+                self._counts["deduplicated"] += 1
+                job.owners.add(owner)
+                return job
+            job = Job(kind, key, fn, args, discard)
+            job.owners.add(owner)
+            self._jobs[job.id] = job
+            self._by_key[key] = job
+            self._queues.setdefault(owner, deque()).append(job)
+            self._cv.notify()
+            return job
+
+    def get(self, job_id: str) -> Job | None:
+        with self._cv:
+            return self._jobs.get(job_id)
+
+    def release(self, owner: str, job_id: str) -> None:
+        """owner がジョブを手放す。誰も持っていない未完了のジョブは取り消す"""
+        with self._cv:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                self._release(owner, job)
+
+    def metrics(self) -> dict:
+        """待ち件数・実行中件数・直近の待ち時間/実行時間（秒）と累計件数"""
+        with self._cv:
+            waits = sorted(self._waits)
+            runs  = sorted(self._runs)
+            queued = sum(len(q) for q in self._queues.values())
+            return dict(
+                self._counts,
+                workers=self.workers,
+                queue_depth=queued,
+                running=self._running,
+                waiting_owners=sum(1 for q in self._queues.values() if q),
+                wait_p50=_pct(waits, 0.5), wait_p95=_pct(waits, 0.95),
+                wait_max=waits[-1] if waits else 0.0,
+                run_p50=_pct(runs, 0.5),
+            )
+
+    # ── 内部（_cv を持った状態で呼ぶ）──
+    def _release(self, owner: str, job: Job) -> None:
+        job.owners.discard(owner)
+        if job.owners or job.finished:
+            return
+        job._cancel.set()
+        # 実行中でも取り消しを要求した時点で共有の対象から外す（同じ key の再投入は新しいジョブにする）
+        self._forget(job)
+        if job.started_at is None:
+            job._finish(CANCELLED)
+            self._counts["cancelled"] += 1
+
+    def _forget(self, job: Job) -> None:
+        if self._by_key.get(job.key) is job:
+            del self._by_key[job.key]
+        for q in self._queues.values():
+            if job in q:
+                q.remove(job)
+
+    def _prune(self) -> None:
+        cutoff = monotonic() - JOB_TTL_SEC
+        for job in [j for j in self._jobs.values()
+                    if j.finished_at is not None and j.finished_at < cutoff]:
+            del self._jobs[job.id]
+            self._forget(job)
+            job._drop()
+        for owner in [o for o, q in self._queues.items() if not q]:
+            del self._queues[owner]
+
+    def _next(self) -> Job | None:
+        """巡回順の先頭の owner から1件取り出し、その owner を末尾へ回す"""
+        for owner in list(self._queues):
+            q = self._queues[owner]
+            if not q:
+                continue
+            job = q.popleft()
+            self._queues.move_to_end(owner)
+            return job
+        return None
+
+    def _worker(self) -> None:
+        while True:
+            with self._cv:
+                job = self._next()
+                while job is None:
+                    self._cv.wait()
+                    job = self._next()
+                job.started_at = monotonic()
+                self._waits.append(job.started_at - job.submitted_at)
+                self._running += 1
+            job._run()
+            with self._cv:
+                self._running -= 1
+                self._runs.append(job.finished_at - job.started_at)
+                state = job.snapshot()["state"]
+                self._counts[state] += 1
+                if state != DONE:
+                    self._forget(job)
+
+
+def _pct(values: list[float], q: float) -> float:
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+@lru_cache(maxsize=None)
+def scheduler() -> JobScheduler:
+    """プロセス内で共有するスケジューラ"""
+    return JobScheduler(JOB_WORKERS)
+
+
+# ==============================================================================
+# ジョブの種類
+# ==============================================================================
+
+def _analyze(job: Job, files: list[_Upload], trace: bool) -> list[dict]:
+    default = default_extract_sink()
+
+    def keep(record: dict) -> None:
+        # 計測レコードを snapshot()["trace"] に残し、既定の出力先があればそちらにも出す
+        with job._lock:
+            job._state["trace"] = record
+        if default is not None:
+            default(record)
+
+    cache: dict = {}
+    result = extract_initiatives(files, progress=job._progress, sink=keep if trace else None,
+                                 cache_stats=cache)
+    with job._lock:
+        job._state["cache"] = cache
+    return result
+
+
+def submit_analysis(owner: str, uploaded_files, trace: bool = False) -> Job:
+    """
+    アップロード一式の解析を投入する。ファイル名と内容の並びが同じなら同じジョブを共有する。
+    結果は extract_initiatives の戻り値（Job.result() は共有しないよう複製を返す）。
+    trace=True なら抽出の計測レコードを snapshot()["trace"] に残す（共有したジョブが
+    計測なしで投入されていた場合は None のまま）。
+    """
+    files = [_Upload(uf.name, uf.getvalue()) for uf in uploaded_files]
+    h = hashlib.sha256(b"analysis\0")
+    for f in files:
+        h.update(f.name.encode("utf-8") + b"\0")
+        h.update(hashlib.sha256(f.getvalue()).digest())
+    return scheduler().submit(owner, "analysis", h.hexdigest(), _analyze, files, trace)
+
+
+def _build_deck(job: Job, initiatives: list[dict], dest_dir: Path) -> str:
+    dest_dir.mkdir(parents=True, exist_ok=True)
+    fd, path = tempfile.mkstemp(prefix="shared_", suffix=".pptx", dir=dest_dir)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            save_pptx(initiatives, f)
+    except Exception:
+        Path(path).unlink(missing_ok=True)
+        raise
+    return path
+
+
+def submit_deck(owner: str, initiatives: list[dict], dest_dir: Path) -> Job:
+    """
+    施策リストからのスライド生成を投入する。結果は dest_dir に書いたファイルのパスで、
+    同じ内容（+ 表紙の日付）のジョブ間で共有する。各セッションは複製（リンク）して使う。
+    ファイルはジョブの保持期限が切れたときに削除する。
+    """
+    raw = json.dumps([initiatives, datetime.now().strftime("%Y%m%d")],
+                     ensure_ascii=False, sort_keys=True)
+    key = hashlib.sha256(b"deck\0" + raw.encode("utf-8")).hexdigest()
+    return scheduler().submit(owner, "deck", key, _build_deck, deepcopy(initiatives), Path(dest_dir),
+                              discard=lambda p: Path(p).unlink(missing_ok=True))
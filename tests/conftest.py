@@ -0,0 +1,6 @@
+import sys
+from pathlib import Path
+
+# relay_core / relay_jobs / relay_batch はリポジトリ直下のモジュール（パッケージ化していない）。
+# `pytest` をどこから実行しても import できるよう、リポジトリ直下を先頭に入れる
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
@@ -0,0 +1,32 @@
+import json
+
+import pytest
+
+from relay_batch import main, run_bundle
+
+TEXT = "\n".join(f"新商品の販促キャンペーンを第{i}週に実施した" for i in range(1, 11))
+
+
+@pytest.mark.parametrize("name", ["../x", "a/b", "a\\b", "..", ""])
+def test_run_bundle_rejects_names_outside_out_dir(tmp_path, name):
+    src = tmp_path / "r.txt"
+    src.write_text(TEXT, "utf-8")
+    out = tmp_path / "out"
+    out.mkdir()
+    with pytest.raises(ValueError):
+        run_bundle(name, [src], out)
+    assert list(tmp_path.rglob("*.pptx")) == []
+
+
+def test_manifest_reports_items_and_skips_unsafe_names(tmp_path, capsys):
+    (tmp_path / "r.txt").write_text(TEXT, "utf-8")
+    manifest = tmp_path / "m.json"
+    manifest.write_text(json.dumps({"team-a": ["r.txt"], "../escape": ["r.txt"]}), "utf-8")
+    out = tmp_path / "out"
+
+    assert main([str(manifest), "-o", str(out)]) == 1
+    captured = capsys.readouterr()
+    assert "items=10" in captured.out
+    assert "../escape" in captured.err
+    assert (out / "team-a.pptx").exists()
+    assert sorted(p.name for p in tmp_path.rglob("*.pptx")) == ["team-a.pptx"]
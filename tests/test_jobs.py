@@ -0,0 +1,57 @@
+import threading
+import time
+
+from relay_jobs import JobScheduler, CANCELLED, DONE
+
+
+def _wait(job, timeout=5.0):
+    end = time.monotonic() + timeout
+    while not job.finished:
+        assert time.monotonic() < end, job.snapshot()
+        time.sleep(0.01)
+
+
+def _blocking(started: threading.Event, go: threading.Event):
+    def fn(job):
+        started.set()
+        while not go.wait(0.01):
+            job._progress("read", 0, 1)     # 取り消されていればここで止まる
+        job._progress("read", 1, 1)
+        return "ok"
+    return fn
+
+
+def test_resubmit_after_cancelling_running_job_runs_again():
+    sch = JobScheduler(1)
+    started, go = threading.Event(), threading.Event()
+    fn = _blocking(started, go)
+
+    first = sch.submit("alice", "analysis", "same-key", fn)
+    assert started.wait(5)
+    sch.release("alice", first.id)          # 実行中に取り消しを要求
+    _wait(first)
+    assert first.snapshot()["state"] == CANCELLED
+
+    go.set()
+    second = sch.submit("alice", "analysis", "same-key", fn)
+    assert second is not first
+    _wait(second)
+    assert second.snapshot()["state"] == DONE
+    assert second.result() == "ok"
+
+
+def test_resubmit_before_cancelled_job_stops_gets_new_job():
+    sch = JobScheduler(1)
+    started, go = threading.Event(), threading.Event()
+    fn = _blocking(started, go)
+
+    first = sch.submit("alice", "analysis", "same-key", fn)
+    assert started.wait(5)
+    sch.release("alice", first.id)
+    second = sch.submit("alice", "analysis", "same-key", fn)   # まだ first は止まっていない
+    assert second is not first
+
+    go.set()
+    _wait(first)
+    _wait(second)
+    assert second.snapshot()["state"] == DONE
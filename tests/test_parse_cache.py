@@ -0,0 +1,51 @@
+import relay_core
+from relay_core import _ParseCache
+
+
+def test_pdf_key_depends_on_text_mode(monkeypatch):
+    data = b"%PDF-1.4 dummy"
+    monkeypatch.setattr(relay_core, "PDF_TEXT_MODE", "layout")
+    layout = _ParseCache.key(data, "a.pdf")
+    monkeypatch.setattr(relay_core, "PDF_TEXT_MODE", "fast")
+    assert _ParseCache.key(data, "a.pdf") != layout
+
+
+def test_non_pdf_key_ignores_text_mode(monkeypatch):
+    data = b"hello"
+    monkeypatch.setattr(relay_core, "PDF_TEXT_MODE", "layout")
+    layout = _ParseCache.key(data, "a.txt")
+    monkeypatch.setattr(relay_core, "PDF_TEXT_MODE", "fast")
+    assert _ParseCache.key(data, "a.txt") == layout
+
+
+class _Upload:
+    def __init__(self, name: str, data: bytes):
+        self.name, self._data = name, data
+
+    def read(self) -> bytes:
+        return self._data
+
+
+def test_cache_stats_counts_only_this_call():
+    text = "\n".join(f"新商品の販促キャンペーンを第{i}週に実施した" for i in range(20)).encode()
+    relay_core._parse_cache().clear()
+    first: dict = {}
+    relay_core.extract_initiatives([_Upload("cache_a.txt", text)], workers=0, cache_stats=first)
+    relay_core.extract_initiatives([_Upload("cache_b.txt", text)], workers=0)   # 別の呼び出し
+    second: dict = {}
+    relay_core.extract_initiatives([_Upload("cache_a.txt", text), _Upload("cache_c.txt", text)],
+                                   workers=0, cache_stats=second)
+    assert first == {"hits": 0, "disk_hits": 0, "misses": 1}
+    assert second == {"hits": 1, "disk_hits": 0, "misses": 1}
+
+
+def test_disk_tier_is_bounded(tmp_path):
+    cache = _ParseCache(1024 * 1024, str(tmp_path), disk_max_bytes=4000)
+    rows = (("x" * 900, "src"),)
+    for i in range(20):
+        cache.put(f"k{i:02d}", rows)
+    total = sum(p.stat().st_size for p in tmp_path.glob("*.json"))
+    assert total <= 4000
+    assert cache.stats["disk_evictions"] > 0
+    assert (tmp_path / "k19.json").exists()          # 新しいものは残る
+    assert not (tmp_path / "k00.json").exists()      # 古いものから消える
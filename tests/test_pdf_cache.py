@@ -0,0 +1,110 @@
+import pytest
+
+import relay_core
+
+pytest.importorskip("pdfplumber")
+
+FONT_WINANSI = b"/WinAnsiEncoding"
+FONT_SWAPPED = b"<< /Type /Encoding /BaseEncoding /WinAnsiEncoding /Differences [72 /X] >>"
+
+
+def _objects(texts: list[bytes], encoding: bytes = FONT_WINANSI, first: int = 4) -> dict[int, bytes]:
+    """1ページ1行の PDF オブジェクト（1: Catalog / 2: Pages / 3: Font / 以降ページと内容）"""
+    objs = {
+        1: b"<< /Type /Catalog /Pages 2 0 R >>",
+        3: b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding " + encoding + b" >>",
+    }
+    for k, text in enumerate(texts):
+        page, content = first + 2 * k, first + 2 * k + 1
+        stream = b"BT /F1 24 Tf 72 700 Td (" + text + b") Tj ET"
+        objs[content] = b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream)
+        objs[page] = (b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                      b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content)
+    return objs
+
+
+def _pages(kids: list[int]) -> bytes:
+    refs = b" ".join(b"%d 0 R" % k for k in kids)
+    return b"<< /Type /Pages /Kids [%s] /Count %d >>" % (refs, len(kids))
+
+
+def _write(objs: dict[int, bytes], doc_id: bytes | None, base: bytes = b"",
+           prev: int | None = None) -> tuple[bytes, int]:
+    """objs を書き出し、xref と trailer を付ける。base があれば増分更新として追記する"""
+    out = bytearray(base or b"%PDF-1.4\n")
+    offsets = {}
+    for n in sorted(objs):
+        offsets[n] = len(out)
+        out += b"%d 0 obj\n%s\nendobj\n" % (n, objs[n])
+    xref = len(out)
+    size = max(objs) + 1
+    out += b"xref\n"
+    if prev is None:
+        out += b"0 %d\n0000000000 65535 f \n" % size
+        for n in range(1, size):
+            out += b"%010d 00000 n \n" % offsets[n]
+    else:
+        for n in sorted(objs):
+            out += b"%d 1\n%010d 00000 n \n" % (n, offsets[n])
+    trailer = b"/Size %d /Root 1 0 R" % size
+    if doc_id is not None:
+        trailer += b" /ID [<%s> <%s>]" % (doc_id.hex().encode(), doc_id.hex().encode())
+    if prev is not None:
+        trailer += b" /Prev %d" % prev
+    out += b"trailer\n<< %s >>\nstartxref\n%d\n%%%%EOF\n" % (trailer, xref)
+    return bytes(out), xref
+
+
+def _pdf(texts: list[bytes], encoding: bytes = FONT_WINANSI, doc_id: bytes | None = None) -> bytes:
+    objs = _objects(texts, encoding)
+    objs[2] = _pages([4 + 2 * k for k in range(len(texts))])
+    return _write(objs, doc_id)[0]
+
+
+@pytest.fixture
+def page_calls(monkeypatch):
+    """_pdf_page_rows（キャッシュにないページの抽出）の呼び出しを記録し、キャッシュを空にする"""
+    relay_core._page_cache().clear()
+    monkeypatch.setattr(relay_core, "PDF_WORKERS", 0)
+    calls = []
+    orig = relay_core._pdf_page_rows
+
+    def rows(pg, i, mode):
+        calls.append(i)
+        return orig(pg, i, mode)
+
+    monkeypatch.setattr(relay_core, "_pdf_page_rows", rows)
+    yield calls
+    relay_core._page_cache().clear()
+
+
+def _read(data: bytes) -> list[str]:
+    return [t for t, _ in relay_core._rd_pdf(data, "a.pdf")]
+
+
+def test_same_stream_with_different_font_encoding_is_not_shared(page_calls):
+    plain   = _read(_pdf([b"Hello World Report"]))
+    swapped = _read(_pdf([b"Hello World Report"], FONT_SWAPPED))
+    assert plain == ["Hello World Report"]
+    assert swapped == ["Xello World Report"]
+    assert page_calls == [1, 1]
+
+
+def test_reupload_with_appended_page_extracts_only_new_page(page_calls):
+    doc_id = b"relay-test-doc-1"
+    texts = [b"Kickoff meeting held", b"Pilot launched in April"]
+    objs = _objects(texts)
+    objs[2] = _pages([4, 6])
+    original, xref = _write(objs, doc_id)
+
+    update = _objects([b"Results improved by 20%"], first=8)
+    update = {n: v for n, v in update.items() if n >= 8}
+    update[2] = _pages([4, 6, 8])
+    appended, _ = _write(update, doc_id, base=original, prev=xref)
+
+    assert _read(original) == ["Kickoff meeting held", "Pilot launched in April"]
+    assert page_calls == [1, 2]
+    page_calls.clear()
+    assert _read(appended) == ["Kickoff meeting held", "Pilot launched in April",
+                               "Results improved by 20%"]
+    assert page_calls == [3]
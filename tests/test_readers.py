@@ -0,0 +1,69 @@
+import io
+from datetime import datetime
+
+import openpyxl
+
+import relay_core
+from relay_core import _rd_txt, _rd_xlsx
+
+
+def _xlsx(rows) -> bytes:
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.title = "Sheet1"
+    for row in rows:
+        ws.append(row)
+    buf = io.BytesIO()
+    wb.save(buf)
+    return buf.getvalue()
+
+
+def test_xlsx_keeps_text_after_many_numeric_rows():
+    rows = [[datetime(2024, 1, 1 + i % 28), 1000 + i] for i in range(60)]
+    rows.append(["新規顧客向けのキャンペーンを実施した"])
+    out = list(_rd_xlsx(_xlsx(rows), "report.xlsx"))
+    assert ("新規顧客向けのキャンペーンを実施した", "report.xlsx Sheet1") in out
+    assert len(out) == 61
+
+
+def test_xlsx_strips_text_cells_and_joins_values():
+    out = list(_rd_xlsx(_xlsx([["  売上  ", 12.5, None, "前年比 "]]), "a.xlsx"))
+    assert out == [("売上 | 12.5 | 前年比", "a.xlsx Sheet1")]
+
+
+def _baseline_txt(data: bytes, nm: str) -> list[tuple[str, str]]:
+    """変更前の _rd_txt（ファイル全体を候補の文字コードで順にデコード）"""
+    for enc in ["utf-8", "shift-jis", "cp932", "utf-16", "latin-1"]:
+        try:
+            text = data.decode(enc)
+        except (UnicodeDecodeError, LookupError):
+            continue
+        return [(line.strip(), nm) for line in text.split("\n")
+                if line.strip() and len(line.strip()) > 4]
+    return [("文字コードを特定できませんでした", nm)]
+
+
+def test_txt_latin1_matches_baseline(tmp_path):
+    # 'ÿ' は Shift_JIS / cp932 で読めないため utf-16・latin-1 の判定まで進む（サンプルより長い）
+    data = ("Smÿrna façade ýes déjà vu report\n" * 6000).encode("latin-1")
+    assert len(data) > relay_core.TXT_SAMPLE_BYTES
+    expected = _baseline_txt(data, "a.txt")
+    assert list(_rd_txt(data, "a.txt")) == expected
+    path = tmp_path / "a.txt"
+    path.write_bytes(data)
+    assert list(_rd_txt(path, "a.txt")) == expected      # スプール（mmap）経由でも同じ
+
+
+def test_txt_latin1_odd_length_falls_back_to_latin1():
+    data = ("Smÿrna façade ýes déjà vu report\n" * 6000 + "!").encode("latin-1")
+    out = list(_rd_txt(data, "a.txt"))
+    assert out == _baseline_txt(data, "a.txt")
+    assert out[0] == ("Smÿrna façade ýes déjà vu report", "a.txt")
+
+
+def test_txt_utf16_without_bom_matches_baseline():
+    data = ("新商品の販促キャンペーンを実施した結果、売上が120%に増加\n" * 3000).encode("utf-16-le")
+    assert len(data) > relay_core.TXT_SAMPLE_BYTES
+    out = list(_rd_txt(data, "a.txt"))
+    assert out == _baseline_txt(data, "a.txt")
+    assert out[0] == ("新商品の販促キャンペーンを実施した結果、売上が120%に増加", "a.txt")